@@ -0,0 +1 @@
+"""Scripts de apoio (estresse, carga e benchmark). Execute a partir da raiz: python -m ferramentas.<script>"""
@@ -0,0 +1,204 @@
+"""
+Benchmark do GestorBD e da CalculadoraAcademica sobre bancos sintéticos.
+
+Para cada tamanho pedido, gera um banco com ferramentas.gerar_dados (ou
+reaproveita o de --dir, se já existir) e mede as operações da semana de
+lançamento de notas:
+
+  login              buscar_login de um aluno (inclui o bcrypt)
+  boletim_turma      buscar_boletim_turma de uma matéria inteira
+  pagina_turma       primeira página da turma (buscar_pagina_turma)
+  busca_turma        página filtrada pelo início do nome
+  boletim_aluno      buscar_boletim_aluno
+  lancar_nota        lancar_nota de uma NP1
+  lancar_pim         lancar_notas com o PIM global (vale para todas as matérias)
+  lancar_notas_lote  lancar_notas_lote de uma turma de LOTE_NOTAS alunos
+  matricula_lote     adicionar_alunos_lote de --matricula alunos (inclui o bcrypt de cada um)
+  ms_lote            calcular_ms_lote da turma inteira (NumPy, se instalado)
+  ms_lote_array      calcular_ms_lote da turma inteira sem NumPy
+
+O cache de leituras do GestorBD fica desligado, para medir o banco. Os
+resultados (ms por execução: mín, mediana, p95, média) vão para um JSON com
+o commit, as versões e a máquina; --comparar mostra a razão entre as
+medianas deste resultado e de um JSON anterior.
+
+Uso:
+    python -m ferramentas.benchmark --alunos 1000 100000 --saida resultado.json
+    python -m ferramentas.benchmark --alunos 100000 --comparar antes.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ferramentas.gerar_dados import SENHA, gerar_banco, ra_sintetico
+from gestor_db import GestorBD, PERFIS_SQLITE, PERFIL_SQLITE_PADRAO
+from modelos import MATERIAS_ADS, PIM_MATERIA
+from servicos import CalculadoraAcademica
+
+LOTE_NOTAS = 500
+MATERIA = MATERIAS_ADS[0]
+
+
+def _estatisticas(tempos: list[float]) -> dict:
+    ordenados = sorted(tempos)
+    return {
+        "execucoes": len(tempos),
+        "min_ms": ordenados[0] * 1000,
+        "mediana_ms": statistics.median(ordenados) * 1000,
+        "p95_ms": ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))] * 1000,
+        "media_ms": statistics.fmean(ordenados) * 1000,
+    }
+
+
+def _medir(funcao, repeticoes: int, preparar=None) -> dict:
+    """
+    Executa funcao(*preparar(i)) `repeticoes` vezes, depois de uma execução de
+    aquecimento (importações e páginas do banco ainda fora da memória); só a
+    chamada de `funcao` é cronometrada.
+    """
+    funcao(*(preparar(-1) if preparar else ()))
+    tempos = []
+    for i in range(repeticoes):
+        args = preparar(i) if preparar else ()
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return _estatisticas(tempos)
+
+
+def _verificar(resultado: tuple[bool, str]):
+    # As escritas devolvem (sucesso, mensagem): uma falha invalida a medição
+    sucesso, mensagem = resultado
+    if not sucesso:
+        raise RuntimeError(mensagem)
+
+
+def executar_casos(gestor: GestorBD, alunos: int, args) -> dict:
+    rng = random.Random(args.semente)
+    calc = CalculadoraAcademica()
+    ra = lambda i: (ra_sintetico(rng.randrange(alunos)),)
+    casos = {}
+
+    casos["login"] = _medir(lambda r: gestor.buscar_login(r, SENHA, 'aluno'), args.repeticoes_login, ra)
+    casos["boletim_turma"] = _medir(lambda: gestor.buscar_boletim_turma(MATERIA), args.repeticoes)
+    casos["pagina_turma"] = _medir(lambda: gestor.buscar_pagina_turma(MATERIA), args.repeticoes)
+    casos["busca_turma"] = _medir(lambda b: gestor.buscar_pagina_turma(MATERIA, busca=b), args.repeticoes,
+                                  lambda i: ("ana s" if i % 2 else "Pedro",))
+    casos["boletim_aluno"] = _medir(gestor.buscar_boletim_aluno, args.repeticoes, ra)
+    casos["lancar_nota"] = _medir(lambda r, n: _verificar(gestor.lancar_nota(r, MATERIA, 'NP1', n)), args.repeticoes,
+                                  lambda i: (ra(i)[0], rng.randrange(21) / 2))
+    casos["lancar_pim"] = _medir(lambda r, n: _verificar(gestor.lancar_notas(r, PIM_MATERIA, {'PIM': n})), args.repeticoes,
+                                 lambda i: (ra(i)[0], rng.randrange(21) / 2))
+    lote = min(LOTE_NOTAS, alunos)
+    casos["lancar_notas_lote"] = _medir(lambda registros: _verificar(gestor.lancar_notas_lote(registros)), args.repeticoes,
+                                        lambda i: ([(ra_sintetico(j), MATERIA, rng.randrange(21) / 2, None, None)
+                                                    for j in rng.sample(range(alunos), lote)],))
+    if args.matricula:
+        novos = iter(range(alunos, alunos + args.matricula * (args.repeticoes_login + 1)))
+        casos["matricula_lote"] = _medir(lambda lista: _verificar(gestor.adicionar_alunos_lote(lista, SENHA)), args.repeticoes_login,
+                                         lambda i: ([(ra_sintetico(next(novos)), "Aluno Novo") for _ in range(args.matricula)],))
+
+    turma = gestor.buscar_boletim_turma(MATERIA)
+    colunas = ([np1 or 0 for _, _, np1, _, _ in turma], [np2 or 0 for _, _, _, np2, _ in turma],
+               [pim or 0 for _, _, _, _, pim in turma])
+    casos["ms_lote"] = _medir(lambda: calc.calcular_ms_lote(*colunas), args.repeticoes)
+    casos["ms_lote_array"] = _medir(lambda: calc._calcular_ms_lote_array(*colunas), args.repeticoes)
+    return casos
+
+
+def _commit_atual() -> str:
+    try:
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=raiz,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _comparar(atual: dict, caminho: str):
+    with open(caminho, encoding='utf-8') as arquivo:
+        anterior = json.load(arquivo)
+    print(f"\nComparação com {caminho} (commit {anterior.get('commit') or '?'}), mediana atual / anterior:")
+    for tamanho, casos in atual["resultados"].items():
+        antigos = anterior.get("resultados", {}).get(tamanho, {})
+        for nome, medida in casos.items():
+            if nome in antigos and antigos[nome]["mediana_ms"] > 0:
+                razao = medida["mediana_ms"] / antigos[nome]["mediana_ms"]
+                marca = "  (pior)" if razao > 1.1 else "  (melhor)" if razao < 0.9 else ""
+                print(f"  {tamanho:>8} {nome:<18} {razao:6.2f}x{marca}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do banco e do cálculo de médias do sistema acadêmico.")
+    parser.add_argument("--alunos", type=int, nargs="+", default=[1000, 10000], help="Tamanhos dos bancos (1k a 1M).")
+    parser.add_argument("--repeticoes", type=int, default=50, help="Execuções de cada consulta/escrita.")
+    parser.add_argument("--repeticoes-login", type=int, default=5, help="Execuções do login e da matrícula (bcrypt).")
+    parser.add_argument("--matricula", type=int, default=20, help="Alunos por matrícula em lote (0 = não medir).")
+    parser.add_argument("--perfil", default=PERFIL_SQLITE_PADRAO, choices=list(PERFIS_SQLITE))
+    parser.add_argument("--dir", help="Pasta dos bancos gerados (reaproveitados entre execuções). Padrão: pasta temporária.")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo JSON do resultado.")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar.")
+    args = parser.parse_args()
+
+    pasta = args.dir or tempfile.mkdtemp(prefix="benchmark_")
+    os.makedirs(pasta, exist_ok=True)
+    resultado = {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "perfil": args.perfil,
+        "resultados": {},
+    }
+    for alunos in args.alunos:
+        db = os.path.join(pasta, f"benchmark_{alunos}.db")
+        if not os.path.exists(db):
+            inicio = time.perf_counter()
+            gerar_banco(db, alunos, args.semente, args.perfil)
+            print(f"Banco de {alunos} alunos gerado em {time.perf_counter() - inicio:.1f}s")
+        # Uma cópia por execução: as escritas medidas não se acumulam no banco gerado
+        copia = os.path.join(pasta, f"execucao_{alunos}.db")
+        with sqlite3.connect(db) as origem, sqlite3.connect(copia) as destino:
+            origem.backup(destino)
+        gestor = GestorBD(copia, perfil=args.perfil)
+        gestor.inicializar_db()
+        try:
+            casos = executar_casos(gestor, alunos, args)
+        finally:
+            gestor.fechar_conexao()
+            for sufixo in ("", "-wal", "-shm"):
+                if os.path.exists(copia + sufixo):
+                    os.remove(copia + sufixo)
+        resultado["resultados"][str(alunos)] = casos
+
+        print(f"\n{alunos} alunos ({args.perfil})")
+        print(f"  {'operação':<18} {'mín':>9} {'mediana':>9} {'p95':>9}")
+        for nome, medida in casos.items():
+            print(f"  {nome:<18} {medida['min_ms']:8.2f}ms {medida['mediana_ms']:8.2f}ms {medida['p95_ms']:8.2f}ms")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nResultado salvo em {args.saida}")
+    if args.comparar:
+        _comparar(resultado, args.comparar)
+    if not args.dir:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Teste de carga da API HTTP (servidor.py).
+
+Cria um banco temporário com alunos e um professor, sobe o servidor em um
+subprocesso e simula muitos alunos consultando o boletim ao mesmo tempo
+(dia de divulgação das notas), com professores lançando notas em paralelo.
+Ao final mostra vazão e latências (p50/p95/p99).
+
+As senhas do banco de teste usam o custo mínimo do bcrypt, gravado também
+como o custo calibrado do banco para esta máquina: o servidor não recalibra
+nem refaz hashes, e o login custa só um bcrypt barato. O objetivo é medir o
+serviço, não o hash do login.
+
+Uso:
+    python -m ferramentas.carga_servidor --clientes 300 --duracao 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from gestor_db import CUSTO_BCRYPT_MINIMO, GestorBD
+from modelos import PIM_MATERIA
+
+SENHA = "123456"
+EMAIL_PROFESSOR = "professor.carga@exemplo.com"
+
+
+def preparar_banco(db: str, alunos: int) -> list[str]:
+    gestor = GestorBD(db, perfil='servidor')
+    gestor.inicializar_db()
+    gestor.definir_custo_bcrypt(CUSTO_BCRYPT_MINIMO)
+    senha_hash = gestor._hash_senha(SENHA)
+    ras = [f"CG{i:07d}" for i in range(alunos)]
+    with gestor.transacao() as cursor:
+        cursor.executemany(
+            "INSERT INTO Alunos (ra, nome, email, senha_hash, curso, primeiro_acesso) VALUES (?, ?, NULL, ?, 'ADS', 0)",
+            [(ra, f"Aluno {ra}", senha_hash) for ra in ras]
+        )
+        gestor._matricular(cursor, ras)
+        cursor.execute(
+            "INSERT INTO Professores (email, nome, senha_hash, materia_principal) VALUES (?, ?, ?, ?)",
+            (EMAIL_PROFESSOR, "Professor Carga", senha_hash, PIM_MATERIA)
+        )
+    gestor.fechar_conexao()
+    return ras
+
+
+class ClienteHTTP:
+    """Cliente HTTP/1.1 mínimo com conexão keep-alive."""
+
+    def __init__(self, host: str, porta: int):
+        self.host, self.porta = host, porta
+        self.reader = self.writer = None
+        self.token = None
+
+    async def requisitar(self, metodo: str, caminho: str, dados=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.porta)
+        corpo = json.dumps(dados).encode('utf-8') if dados is not None else b''
+        cabecalhos = f"{metodo} {caminho} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(corpo)}\r\n"
+        if self.token:
+            cabecalhos += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(cabecalhos.encode('latin-1') + b"\r\n" + corpo)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        tamanho = 0
+        while True:
+            linha = await self.reader.readline()
+            if linha in (b'\r\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            if nome.lower() == 'content-length':
+                tamanho = int(valor)
+        resposta = json.loads(await self.reader.readexactly(tamanho)) if tamanho else None
+        return status, resposta
+
+    async def fechar(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def _aluno(host, porta, ra, fim, latencias, erros):
+    cliente = ClienteHTTP(host, porta)
+    try:
+        status, resposta = await cliente.requisitar("POST", "/login", {"credencial": ra, "senha": SENHA, "tipo": "aluno"})
+        if status != 200:
+            erros.append(f"login {ra}: {status}")
+            return
+        cliente.token = resposta['token']
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            status, _ = await cliente.requisitar("GET", f"/alunos/{ra}/boletim")
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                erros.append(f"boletim {ra}: {status}")
+    except (OSError, asyncio.IncompleteReadError) as e:
+        erros.append(f"{ra}: {e}")
+    finally:
+        await cliente.fechar()
+
+
+async def _professor(host, porta, ras, fim, latencias, erros):
+    cliente = ClienteHTTP(host, porta)
+    try:
+        status, resposta = await cliente.requisitar("POST", "/login", {"credencial": EMAIL_PROFESSOR, "senha": SENHA, "tipo": "professor"})
+        cliente.token = resposta['token']
+        rodada = 0
+        while time.perf_counter() < fim:
+            lote = [{"ra": ra, "np1": (rodada % 10) + 0.5, "pim": (rodada % 10) + 0.5} for ra in ras[rodada % len(ras):][:50]]
+            inicio = time.perf_counter()
+            status, _ = await cliente.requisitar("POST", "/notas", {"lancamentos": lote})
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                erros.append(f"notas: {status}")
+            rodada += 1
+    finally:
+        await cliente.fechar()
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def _resumo(nome: str, latencias: list[float], duracao: float) -> str:
+    return (f"{nome}: {len(latencias)} req ({len(latencias) / duracao:.0f}/s) | "
+            f"p50 {_percentil(latencias, .50) * 1000:.1f} ms | p95 {_percentil(latencias, .95) * 1000:.1f} ms | "
+            f"p99 {_percentil(latencias, .99) * 1000:.1f} ms | max {max(latencias, default=0) * 1000:.1f} ms")
+
+
+async def _executar(args, ras):
+    fim = time.perf_counter() + args.duracao
+    lat_boletim, lat_notas, erros = [], [], []
+    tarefas = [_aluno(args.host, args.porta, ras[i % len(ras)], fim, lat_boletim, erros) for i in range(args.clientes)]
+    tarefas += [_professor(args.host, args.porta, ras, fim, lat_notas, erros) for _ in range(args.professores)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*tarefas)
+    duracao = time.perf_counter() - inicio
+    print(_resumo("GET boletim", lat_boletim, duracao))
+    if args.professores:
+        print(_resumo("POST notas ", lat_notas, duracao))
+    print(f"Erros: {len(erros)}")
+    for erro in erros[:10]:
+        print(f"  {erro}")
+    return 1 if erros else 0
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da API HTTP do sistema acadêmico.")
+    parser.add_argument("--alunos", type=int, default=1000, help="Alunos no banco de teste.")
+    parser.add_argument("--clientes", type=int, default=200, help="Alunos consultando ao mesmo tempo.")
+    parser.add_argument("--professores", type=int, default=2, help="Professores lançando notas ao mesmo tempo.")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Duração da carga, em segundos.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, help="Porta do servidor (padrão: uma porta livre).")
+    args = parser.parse_args()
+    args.porta = args.porta or _porta_livre()
+
+    db = os.path.join(tempfile.mkdtemp(prefix="carga_"), "carga.db")
+    ras = preparar_banco(db, args.alunos)
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    servidor = subprocess.Popen([sys.executable, os.path.join(raiz, "servidor.py"), "--db", db, "--host", args.host, "--porta", str(args.porta)])
+    try:
+        # Espera o servidor aceitar conexões
+        for _ in range(100):
+            try:
+                socket.create_connection((args.host, args.porta), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        print(f"Banco: {db} | {args.alunos} alunos | {args.clientes} clientes | {args.professores} professores | {args.duracao:.0f}s")
+        return asyncio.run(_executar(args, ras))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Teste de estresse de escrita concorrente no banco do sistema acadêmico.
+
+Sobe N processos que lançam notas ao mesmo tempo no mesmo arquivo SQLite,
+cada um pelo seu próprio GestorBD (como várias cópias do main.py), e confere
+no final que nenhuma escrita se perdeu:
+
+  - cada escritor é dono de alguns alunos e grava NP1/NP2 (lancar_nota) e o
+    PIM global (lancar_notas) deles; o valor final de cada célula tem que ser
+    o último valor que o escritor gravou;
+  - todos os escritores incrementam o mesmo contador em transações
+    read-modify-write; o total tem que ser escritores x iterações.
+
+Uso:
+    python -m ferramentas.estresse_concorrencia --escritores 16 --iteracoes 50
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from gestor_db import GestorBD, PERFIS_SQLITE, PERFIL_SQLITE_PADRAO
+from modelos import MATERIAS_ADS, PIM_MATERIA
+
+MATERIA_TESTE = MATERIAS_ADS[1]
+
+
+def _ra(escritor: int, indice: int) -> str:
+    return f"ES{escritor:03d}{indice:04d}"
+
+
+def _nota(escritor: int, iteracao: int, indice: int) -> float:
+    """Valor determinístico (e sempre válido) para cada escrita."""
+    return round(((escritor * 7 + iteracao * 3 + indice) % 101) / 10, 1)
+
+
+def preparar_banco(db: str, perfil: str, escritores: int, alunos_por_escritor: int):
+    gestor = GestorBD(db, perfil=perfil)
+    gestor.inicializar_db()
+    alunos = [(_ra(e, i), f"Aluno {e}-{i}") for e in range(escritores) for i in range(alunos_por_escritor)]
+    # Uma só senha provisória para todos: o teste mede escrita de notas, não bcrypt
+    senha_hash = gestor._hash_senha("123456")
+    with gestor.transacao() as cursor:
+        cursor.execute("CREATE TABLE IF NOT EXISTS ContadorEstresse (id INTEGER PRIMARY KEY, valor INTEGER NOT NULL)")
+        cursor.execute("INSERT OR REPLACE INTO ContadorEstresse (id, valor) VALUES (1, 0)")
+        cursor.executemany(
+            "INSERT INTO Alunos (ra, nome, email, senha_hash, curso, primeiro_acesso) VALUES (?, ?, NULL, ?, 'ADS', 1)",
+            [(ra, nome, senha_hash) for ra, nome in alunos]
+        )
+        gestor._matricular(cursor, [ra for ra, _ in alunos])
+    gestor.fechar_conexao()
+
+
+def _incrementar_contador(cursor):
+    cursor.execute("SELECT valor FROM ContadorEstresse WHERE id = 1")
+    valor = cursor.fetchone()['valor']
+    cursor.execute("UPDATE ContadorEstresse SET valor = ? WHERE id = 1", (valor + 1,))
+
+
+def escritor(db: str, perfil: str, escritor_id: int, iteracoes: int, alunos_por_escritor: int, largada, fila):
+    gestor = GestorBD(db, perfil=perfil)
+    falhas = []
+    operacoes = 0
+    largada.wait()
+    inicio = time.perf_counter()
+    for it in range(iteracoes):
+        for i in range(alunos_por_escritor):
+            ra = _ra(escritor_id, i)
+            for tipo, ok_msg in (
+                ('NP1', gestor.lancar_nota(ra, MATERIA_TESTE, 'NP1', _nota(escritor_id, it, i))),
+                ('NP2/PIM', gestor.lancar_notas(ra, PIM_MATERIA, {'NP2': _nota(escritor_id, it, i + 1), 'PIM': _nota(escritor_id, it, i + 2)})),
+            ):
+                operacoes += 1
+                if not ok_msg[0]:
+                    falhas.append(f"{ra} {tipo}: {ok_msg[1]}")
+        try:
+            gestor._executar_escrita(_incrementar_contador)
+            operacoes += 1
+        except Exception as e:
+            falhas.append(f"contador: {e}")
+    fila.put((escritor_id, operacoes, time.perf_counter() - inicio, gestor.total_retentativas, falhas))
+    gestor.fechar_conexao()
+
+
+def verificar(db: str, perfil: str, escritores: int, iteracoes: int, alunos_por_escritor: int) -> list[str]:
+    """Compara o estado final do banco com o último valor gravado por cada escritor."""
+    gestor = GestorBD(db, perfil=perfil)
+    perdidas = []
+    ultima = iteracoes - 1
+    for e in range(escritores):
+        for i in range(alunos_por_escritor):
+            ra = _ra(e, i)
+            np1, _, pim = gestor.buscar_notas_aluno(ra, MATERIA_TESTE)
+            _, np2, _ = gestor.buscar_notas_aluno(ra, PIM_MATERIA)
+            esperado = (_nota(e, ultima, i), _nota(e, ultima, i + 1), _nota(e, ultima, i + 2))
+            if (np1, np2, pim) != esperado:
+                perdidas.append(f"{ra}: esperado {esperado}, encontrado {(np1, np2, pim)}")
+    with gestor.sessao() as conn:
+        contador = conn.execute("SELECT valor FROM ContadorEstresse WHERE id = 1").fetchone()['valor']
+    if contador != escritores * iteracoes:
+        perdidas.append(f"contador: esperado {escritores * iteracoes}, encontrado {contador}")
+    gestor.fechar_conexao()
+    return perdidas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--escritores", type=int, default=16)
+    parser.add_argument("--iteracoes", type=int, default=20)
+    parser.add_argument("--alunos", type=int, default=3, help="Alunos por escritor.")
+    parser.add_argument("--perfil", default=PERFIL_SQLITE_PADRAO, choices=list(PERFIS_SQLITE))
+    parser.add_argument("--db", help="Arquivo do banco (padrão: arquivo temporário novo).")
+    args = parser.parse_args()
+
+    db = args.db or os.path.join(tempfile.mkdtemp(prefix="estresse_"), "estresse.db")
+    print(f"Banco: {db} | perfil: {args.perfil} | {args.escritores} escritores x {args.iteracoes} iterações")
+    preparar_banco(db, args.perfil, args.escritores, args.alunos)
+
+    largada = multiprocessing.Event()
+    fila = multiprocessing.Queue()
+    processos = [
+        multiprocessing.Process(target=escritor, args=(db, args.perfil, e, args.iteracoes, args.alunos, largada, fila))
+        for e in range(args.escritores)
+    ]
+    for p in processos:
+        p.start()
+    inicio = time.perf_counter()
+    largada.set()
+    resultados = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+    duracao = time.perf_counter() - inicio
+
+    total_ops = sum(r[1] for r in resultados)
+    retentativas = sum(r[3] for r in resultados)
+    falhas = [f for r in resultados for f in r[4]]
+    perdidas = verificar(db, args.perfil, args.escritores, args.iteracoes, args.alunos)
+
+    print(f"{total_ops} transações em {duracao:.2f}s ({total_ops / duracao:.0f}/s), {retentativas} retentativa(s)")
+    print(f"Escritas com erro: {len(falhas)} | Escritas perdidas: {len(perdidas)}")
+    for linha in (falhas + perdidas)[:20]:
+        print(f"  {linha}")
+    return 1 if falhas or perdidas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Gerador de bancos sintéticos para benchmarks e testes de volume.
+
+Preenche Alunos, Notas (todas as MATERIAS_ADS) e NotasPIM com N alunos de
+nomes e notas aleatórios (reprodutíveis pela semente) e cadastra um
+professor por matéria. Todos os usuários usam a mesma senha, com um único
+hash bcrypt no custo calibrado desta máquina (ou no mínimo, sem calibração):
+o login dos benchmarks mede o custo real, sem refazer o hash, e a geração de
+1M de alunos não precisa de 1M de hashes.
+
+Uso:
+    python -m ferramentas.gerar_dados --alunos 100000 --db volume.db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from gestor_db import GestorBD, PERFIS_SQLITE, PERFIL_SQLITE_PADRAO
+from modelos import MATERIAS_ADS
+
+SENHA = "123456"
+# Registros gravados por executemany: limita a memória com 1M de alunos
+TAMANHO_BLOCO = 20000
+
+NOMES = ("Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João",
+         "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Pedro", "Rafaela", "Samuel", "Tatiane", "Vinícius")
+SOBRENOMES = ("Almeida", "Barbosa", "Cardoso", "Costa", "Dias", "Ferreira", "Gomes", "Lima", "Martins", "Oliveira",
+              "Pereira", "Ribeiro", "Rocha", "Santos", "Silva", "Souza", "Teixeira", "Vieira")
+
+
+def ra_sintetico(indice: int) -> str:
+    return f"BM{indice:07d}"
+
+
+def email_professor(materia: str) -> str:
+    return f"prof.{materia.lower()}@exemplo.com"
+
+
+def _nota(rng: random.Random) -> float:
+    # Notas em passos de 0.5, como as lançadas na prática, com uma parte dos alunos abaixo da média
+    return min(10.0, max(0.0, round(rng.gauss(6.5, 2.2) * 2) / 2))
+
+
+def gerar_banco(db: str, alunos: int, semente: int = 0, perfil: str = PERFIL_SQLITE_PADRAO) -> list[str]:
+    """Cria (ou completa) o banco `db` com `alunos` alunos sintéticos; devolve os RAs gerados."""
+    rng = random.Random(semente)
+    gestor = GestorBD(db, perfil=perfil)
+    gestor.inicializar_db()
+    senha_hash = gestor._hash_senha(SENHA)
+    ras = [ra_sintetico(i) for i in range(alunos)]
+    try:
+        for inicio in range(0, alunos, TAMANHO_BLOCO):
+            bloco = ras[inicio:inicio + TAMANHO_BLOCO]
+            with gestor.transacao() as cursor:
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO Alunos (ra, nome, email, senha_hash, curso, primeiro_acesso) VALUES (?, ?, NULL, ?, 'ADS', 0)",
+                    [(ra, f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}", senha_hash) for ra in bloco]
+                )
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO Notas (ra_aluno, materia, np1, np2) VALUES (?, ?, ?, ?)",
+                    [(ra, materia, _nota(rng), _nota(rng)) for ra in bloco for materia in MATERIAS_ADS]
+                )
+                cursor.executemany("INSERT OR IGNORE INTO NotasPIM (ra_aluno, pim) VALUES (?, ?)",
+                                   [(ra, _nota(rng)) for ra in bloco])
+        with gestor.transacao() as cursor:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO Professores (email, nome, senha_hash, materia_principal) VALUES (?, ?, ?, ?)",
+                [(email_professor(materia), f"Professor de {materia}", senha_hash, materia) for materia in MATERIAS_ADS]
+            )
+            # As inclusões acima não são alterações de notas para quem já está com a tela aberta
+            cursor.execute("DELETE FROM AlteracoesNotas")
+        with gestor.sessao() as conn:
+            conn.execute("ANALYZE")
+    finally:
+        gestor.fechar_conexao()
+    return ras
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Gera um banco sintético do sistema acadêmico.")
+    parser.add_argument("--alunos", type=int, default=10000, help="Quantidade de alunos (1k a 1M).")
+    parser.add_argument("--db", default="sintetico.db", help="Arquivo do banco SQLite.")
+    parser.add_argument("--semente", type=int, default=0, help="Semente dos nomes e notas aleatórios.")
+    parser.add_argument("--perfil", default=PERFIL_SQLITE_PADRAO, choices=list(PERFIS_SQLITE))
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        print(f"{args.db} já existe: os alunos que faltarem serão acrescentados.")
+    inicio = time.perf_counter()
+    gerar_banco(args.db, args.alunos, args.semente, args.perfil)
+    print(f"{args.alunos} alunos x {len(MATERIAS_ADS)} matérias em {args.db} ({time.perf_counter() - inicio:.1f}s). Senha de todos: {SENHA}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Relatório do tempo de abertura do sistema.
+
+Roda `python -X importtime` importando o módulo indicado (por padrão o
+main.py) em um interpretador novo e lista os módulos que mais pesam na
+importação: o tempo próprio de cada um e o acumulado com os que ele importa.
+Com --janela, também abre o main.py de verdade algumas vezes (variável
+SISTEMA_MEDIR_INICIO: a janela fecha assim que a primeira tela é desenhada)
+e mostra o tempo total, do início do processo até a tela de login.
+
+Uso:
+    python -m ferramentas.tempo_inicializacao --top 15
+    python -m ferramentas.tempo_inicializacao --janela 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir_importacao(modulo: str) -> list[tuple[str, int, int]]:
+    """Importa `modulo` com -X importtime; devolve [(módulo, próprio µs, acumulado µs)] na ordem de importação."""
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                              cwd=RAIZ, capture_output=True, text=True)
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+    medidas = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        medidas.append((nome.strip(), int(proprio), int(acumulado)))
+    return medidas
+
+
+def medir_janela(repeticoes: int) -> list[float]:
+    """Abre e fecha o main.py `repeticoes` vezes; devolve o tempo de cada abertura, em segundos."""
+    ambiente = dict(os.environ, SISTEMA_MEDIR_INICIO="1")
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        processo = subprocess.run([sys.executable, os.path.join(RAIZ, "main.py")],
+                                  cwd=RAIZ, env=ambiente, capture_output=True, text=True)
+        if processo.returncode != 0:
+            raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Relatório do tempo de abertura do sistema acadêmico.")
+    parser.add_argument("--modulo", default="main", help="Módulo importado na medição (padrão: main).")
+    parser.add_argument("--top", type=int, default=15, help="Quantos módulos listar.")
+    parser.add_argument("--janela", type=int, default=0, metavar="N",
+                        help="Também abre o main.py N vezes e mede o tempo até a primeira tela.")
+    args = parser.parse_args()
+
+    try:
+        medidas = medir_importacao(args.modulo)
+    except RuntimeError as e:
+        print(f"Falha ao importar {args.modulo}: {e}")
+        return 1
+    total = next((acumulado for nome, _, acumulado in medidas if nome == args.modulo), 0)
+    print(f"Importação de {args.modulo}: {total / 1000:.1f} ms ({len(medidas)} módulos)")
+    print(f"\n{'acumulado':>10} {'próprio':>9}  módulo")
+    for nome, proprio, acumulado in sorted(medidas, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{acumulado / 1000:8.1f}ms {proprio / 1000:7.1f}ms  {nome}")
+
+    if args.janela:
+        try:
+            tempos = medir_janela(args.janela)
+        except RuntimeError as e:
+            print(f"\nFalha ao abrir o main.py: {e}")
+            return 1
+        print(f"\nAbertura até a primeira tela ({args.janela}x): mediana {statistics.median(tempos) * 1000:.0f} ms | "
+              f"mín {min(tempos) * 1000:.0f} ms | máx {max(tempos) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,535 @@
 import sqlite3
-import bcrypt
 import typing
 import re
+import threading
+import contextlib
+import inspect
+import os
+import time
+import random
+import string
+import math
+import hmac
+import hashlib
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass
 
 # Importa as classes modelo E a lista de matérias
-from modelos import Aluno, Professor, MATERIAS_ADS 
+from modelos import Aluno, Professor, MATERIAS_ADS, PIM_MATERIA
+from servicos import CalculadoraAcademica
+from instrumentacao import InstrumentacaoBD
+
+# --- MÉDIA E STATUS NO BANCO ---
+# Mesma regra da CalculadoraAcademica, gerada a partir das suas constantes,
+# para que listagens e contagens por status sejam resolvidas pelo SQLite.
+
+def _expressao_parcial(np1: str = "np1", np2: str = "np2") -> str:
+    """Parte da Média Semestral que depende só da matéria (NP1 e NP2; nulas contam como 0)."""
+    calc = CalculadoraAcademica
+    return f"COALESCE({np1}, 0) * {calc.PESO_NP1} + COALESCE({np2}, 0) * {calc.PESO_NP2}"
+
+def _expressao_ms(parcial: str = "media_parcial", pim: str = "pim") -> str:
+    """
+    Expressão SQL da Média Semestral, sem arredondar, a partir da parcial e do
+    PIM global do aluno. O arredondamento fica com o Python: o ROUND do SQLite
+    nem sempre arredonda como o round() de CalculadoraAcademica.calcular_ms.
+    """
+    return f"({parcial} + COALESCE({pim}, 0) * {CalculadoraAcademica.PESO_PIM})"
+
+# Limites de status sobre a MS sem arredondar (veja CalculadoraAcademica.menor_ms_bruta)
+LIMITE_APROVACAO = CalculadoraAcademica.menor_ms_bruta(CalculadoraAcademica.NOTA_APROVACAO)
+LIMITE_EXAME = CalculadoraAcademica.menor_ms_bruta(CalculadoraAcademica.NOTA_EXAME_MIN)
+
+def _expressao_status(ms: str = "ms_bruta") -> str:
+    """Expressão SQL do status a partir da MS sem arredondar."""
+    calc = CalculadoraAcademica
+    return (f"CASE WHEN {ms} >= {LIMITE_APROVACAO!r} THEN '{calc.STATUS_NOMES[calc.STATUS_APROVADO]}'"
+            f" WHEN {ms} >= {LIMITE_EXAME!r} THEN '{calc.STATUS_NOMES[calc.STATUS_EXAME]}'"
+            f" ELSE '{calc.STATUS_NOMES[calc.STATUS_REPROVADO]}' END")
+
+def _ddl_notas(tabela: str) -> str:
+    """CREATE TABLE da tabela Notas (também usado para recriá-la nas migrações)."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {tabela} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ra_aluno TEXT NOT NULL,
+            materia TEXT NOT NULL,
+            np1 REAL DEFAULT 0.0,
+            np2 REAL DEFAULT 0.0,
+            media_parcial REAL GENERATED ALWAYS AS ({_expressao_parcial()}) VIRTUAL,
+            FOREIGN KEY (ra_aluno) REFERENCES Alunos(ra) ON DELETE CASCADE,
+            UNIQUE (ra_aluno, materia)
+        )
+    """
+
+def _ddl_boletim_notas() -> str:
+    """
+    CREATE VIEW da BoletimNotas: notas do aluno na matéria, com o PIM global,
+    a MS sem arredondar (ms_bruta) e o status.
+    """
+    ms = _expressao_ms('N.media_parcial', 'P.pim')
+    return f"""CREATE VIEW BoletimNotas AS
+            SELECT N.ra_aluno, A.nome, N.materia, N.np1, N.np2, P.pim, N.media_parcial,
+                   {ms} AS ms_bruta,
+                   {_expressao_status(ms)} AS status
+            FROM Notas N
+            INNER JOIN Alunos A ON A.ra = N.ra_aluno
+            LEFT JOIN NotasPIM P ON P.ra_aluno = N.ra_aluno"""
+
+# Status -> faixa de MS sem arredondar [mínimo, máximo) usada nos filtros por status.
+FAIXAS_STATUS: typing.Dict[str, tuple[typing.Optional[float], typing.Optional[float]]] = {
+    CalculadoraAcademica.STATUS_NOMES[CalculadoraAcademica.STATUS_APROVADO]: (LIMITE_APROVACAO, None),
+    CalculadoraAcademica.STATUS_NOMES[CalculadoraAcademica.STATUS_EXAME]: (LIMITE_EXAME, LIMITE_APROVACAO),
+    CalculadoraAcademica.STATUS_NOMES[CalculadoraAcademica.STATUS_REPROVADO]: (None, LIMITE_EXAME),
+}
+
+# --- CONSULTAS SQL ---
+# As consultas usadas pelo GestorBD ficam centralizadas aqui para que
+# explicar_consultas() consiga gerar o EXPLAIN QUERY PLAN de cada uma.
+
+SQL_ALUNO_EXISTE = "SELECT 1 FROM Alunos WHERE ra = ?"
+# {marcadores} é preenchido com um '?' por RA
+SQL_RAS_EXISTENTES = "SELECT ra FROM Alunos WHERE ra IN ({marcadores})"
+SQL_PROFESSOR_EXISTE = "SELECT 1 FROM Professores WHERE email = ?"
+SQL_LOGIN_ALUNO = "SELECT ra, nome, senha_hash, curso, primeiro_acesso, email FROM Alunos WHERE ra = ?"
+SQL_LOGIN_PROFESSOR = "SELECT email, nome, senha_hash, materia_principal FROM Professores WHERE email = ?"
+# Troca de hash no login: só grava se o hash ainda for o que foi verificado
+SQL_REHASH_ALUNO = "UPDATE Alunos SET senha_hash = ? WHERE ra = ? AND senha_hash = ?"
+SQL_REHASH_PROFESSOR = "UPDATE Professores SET senha_hash = ? WHERE email = ? AND senha_hash = ?"
+SQL_LER_CONFIGURACAO = "SELECT valor FROM Configuracoes WHERE chave = ?"
+SQL_GRAVAR_CONFIGURACAO = "INSERT OR REPLACE INTO Configuracoes (chave, valor) VALUES (?, ?)"
+SQL_ALUNOS_DA_MATERIA = """
+    SELECT A.nome, A.ra 
+    FROM Alunos A
+    INNER JOIN Notas N ON A.ra = N.ra_aluno 
+    WHERE N.materia = ?
+    ORDER BY A.nome
+"""
+SQL_BOLETIM_TURMA = """
+    SELECT A.ra, A.nome, N.np1, N.np2, P.pim
+    FROM Notas N
+    INNER JOIN Alunos A ON A.ra = N.ra_aluno
+    LEFT JOIN NotasPIM P ON P.ra_aluno = N.ra_aluno
+    WHERE N.materia = ?
+    ORDER BY A.nome
+"""
+# Paginação por chave: percorre idx_alunos_busca (nome sem distinção de
+# maiúsculas, ra) ou a chave primária (busca por RA) a partir da última linha
+# exibida, sem OFFSET. O CROSS JOIN fixa Alunos como tabela externa (no SQLite
+# ele impede a reordenação), para que o LIMIT encerre a leitura do índice logo
+# após a página. {condicoes} e {ordem} vêm de _sql_pagina_turma.
+SQL_PAGINA_TURMA = """
+    SELECT A.ra, A.nome, N.np1, N.np2, P.pim
+    FROM Alunos A
+    CROSS JOIN Notas N ON N.ra_aluno = A.ra AND N.materia = ?
+    LEFT JOIN NotasPIM P ON P.ra_aluno = A.ra
+    WHERE {condicoes}
+    ORDER BY {ordem}
+    LIMIT ?
+"""
+
+# Equivalente em Python da collation NOCASE do SQLite (só A-Z viram minúsculas)
+_TABELA_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def _busca_por_ra(busca: str) -> bool:
+    """Termos com dígitos são prefixos de RA; os demais, prefixos do nome."""
+    return any(c.isdigit() for c in busca)
+
+def _fim_prefixo(prefixo: str) -> str:
+    """Limite superior (exclusivo) da faixa de textos que começam com `prefixo`."""
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+def chave_paginacao(ra: str, nome: str, busca: str = "") -> tuple:
+    """
+    Chave de ordenação da listagem paginada da turma, usada em `apos`/`antes`
+    de GestorBD.buscar_pagina_turma: (nome sem distinção de maiúsculas, ra),
+    ou (ra,) quando a busca é por RA.
+    """
+    if _busca_por_ra(busca.strip()):
+        return (ra,)
+    return (nome.translate(_TABELA_NOCASE), ra)
+
+def corresponde_busca(ra: str, nome: str, busca: str) -> bool:
+    """O mesmo critério de busca de buscar_pagina_turma, aplicado em Python."""
+    busca = busca.strip()
+    if not busca:
+        return True
+    if _busca_por_ra(busca):
+        return ra.startswith(busca.upper())
+    return nome.translate(_TABELA_NOCASE).startswith(busca.translate(_TABELA_NOCASE))
+
+def _sql_pagina_turma(materia: str, limite: int, apos: typing.Optional[tuple] = None,
+                      antes: typing.Optional[tuple] = None, busca: str = "",
+                      status: typing.Optional[str] = None) -> tuple[str, tuple]:
+    """Monta a consulta (e os parâmetros) de GestorBD.buscar_pagina_turma."""
+    busca = busca.strip()
+    condicoes: typing.List[str] = []
+    params: typing.List[typing.Any] = [materia]
+
+    if _busca_por_ra(busca):
+        colunas = ("A.ra",)
+        prefixo = busca.upper()
+        condicoes.append("A.ra >= ? AND A.ra < ?")
+        params += [prefixo, _fim_prefixo(prefixo)]
+    else:
+        colunas = ("A.nome COLLATE NOCASE", "A.ra")
+        if busca:
+            prefixo = busca.translate(_TABELA_NOCASE)
+            condicoes.append("A.nome COLLATE NOCASE >= ? AND A.nome COLLATE NOCASE < ?")
+            params += [prefixo, _fim_prefixo(prefixo)]
+
+    if status is not None:
+        if status not in FAIXAS_STATUS:
+            raise ValueError(f"Status desconhecido: {status}.")
+        minimo, maximo = FAIXAS_STATUS[status]
+        ms = _expressao_ms('N.media_parcial', 'P.pim')
+        if minimo is not None:
+            condicoes.append(f"{ms} >= ?")
+            params.append(minimo)
+        if maximo is not None:
+            condicoes.append(f"{ms} < ?")
+            params.append(maximo)
+
+    # A chave é comparada como "c1 >= k1 AND (c1 > k1 OR c2 > k2)": a comparação
+    # de tuplas (c1, c2) > (k1, k2) não aproveita o índice com COLLATE NOCASE
+    chave = apos if apos is not None else antes
+    operador = '>' if apos is not None else '<'
+    if chave is not None:
+        if len(colunas) == 1:
+            condicoes.append(f"{colunas[0]} {operador} ?")
+            params.append(chave[0])
+        else:
+            condicoes.append(f"{colunas[0]} {operador}= ? AND ({colunas[0]} {operador} ? OR {colunas[1]} {operador} ?)")
+            params += [chave[0], chave[0], chave[1]]
+
+    # A página anterior é lida de trás para frente
+    direcao = "DESC" if apos is None and antes is not None else "ASC"
+    sql = SQL_PAGINA_TURMA.format(
+        condicoes=" AND ".join(condicoes) or "1",
+        ordem=", ".join(f"{coluna} {direcao}" for coluna in colunas),
+    )
+    return sql, (*params, limite)
+
+SQL_CONTAR_TURMA = "SELECT COUNT(*) AS total FROM Notas WHERE materia = ?"
+# {marcadores} é preenchido com um '?' por RA
+SQL_BOLETIM_ALUNOS_DA_TURMA = """
+    SELECT A.ra, A.nome, N.np1, N.np2, P.pim
+    FROM Notas N
+    INNER JOIN Alunos A ON A.ra = N.ra_aluno
+    LEFT JOIN NotasPIM P ON P.ra_aluno = N.ra_aluno
+    WHERE N.materia = ? AND N.ra_aluno IN ({marcadores})
+"""
+SQL_BOLETIM_ALUNO = """
+    SELECT N.materia, N.np1, N.np2, P.pim
+    FROM Notas N
+    LEFT JOIN NotasPIM P ON P.ra_aluno = N.ra_aluno
+    WHERE N.ra_aluno = ?
+"""
+# A faixa de media_parcial é um pré-filtro que usa o índice (materia, media_parcial);
+# a faixa de ms, que depende do PIM, é conferida depois em cada linha encontrada.
+SQL_ALUNOS_POR_STATUS = """
+    SELECT ra_aluno, nome, np1, np2, pim, ms_bruta
+    FROM BoletimNotas
+    WHERE materia = ? AND media_parcial >= ? AND media_parcial < ? AND ms_bruta >= ? AND ms_bruta < ?
+    ORDER BY nome
+"""
+SQL_CONTAGEM_STATUS = "SELECT materia, status, COUNT(*) AS total FROM BoletimNotas GROUP BY materia, status"
+SQL_NOTAS_ALUNO = """
+    SELECT N.np1, N.np2, P.pim
+    FROM Notas N
+    LEFT JOIN NotasPIM P ON P.ra_aluno = N.ra_aluno
+    WHERE N.ra_aluno = ? AND N.materia = ?
+"""
+SQL_MATRICULA_EXISTE = "SELECT 1 FROM Notas WHERE ra_aluno = ? AND materia = ?"
+SQL_ATUALIZAR_NOTAS = "UPDATE Notas SET np1 = COALESCE(?, np1), np2 = COALESCE(?, np2) WHERE ra_aluno = ? AND materia = ?"
+# {colunas} traz só as notas informadas ("np1 = ?", "np2 = ?")
+SQL_ATUALIZAR_COLUNAS_NOTAS = "UPDATE Notas SET {colunas} WHERE ra_aluno = ? AND materia = ?"
+SQL_ATUALIZAR_PIM_ALUNO = "UPDATE NotasPIM SET pim = ? WHERE ra_aluno = ?"
+SQL_VERSAO_ALTERACOES = "SELECT seq FROM sqlite_sequence WHERE name = 'AlteracoesNotas'"
+SQL_ALTERACOES_TURMA = """
+    SELECT DISTINCT ra_aluno FROM AlteracoesNotas
+    WHERE versao > ? AND versao <= ? AND (materia = ? OR materia IS NULL)
+"""
+SQL_ALTERACOES_ALUNO = """
+    SELECT DISTINCT materia FROM AlteracoesNotas
+    WHERE ra_aluno = ? AND versao > ? AND versao <= ?
+"""
+SQL_MINIMA_ALTERACOES = "SELECT MIN(versao) AS minima FROM AlteracoesNotas"
+# MIN e MAX em subconsultas separadas: juntos no mesmo SELECT, o SQLite
+# deixa de ler cada extremo direto da chave primária e percorre a tabela
+SQL_FAIXA_ALTERACOES = "SELECT (SELECT MIN(versao) FROM AlteracoesNotas), (SELECT MAX(versao) FROM AlteracoesNotas)"
+SQL_APARAR_ALTERACOES = "DELETE FROM AlteracoesNotas WHERE versao <= ?"
+SQL_ATUALIZAR_PRIMEIRO_ACESSO = "UPDATE Alunos SET email = ?, senha_hash = ?, primeiro_acesso = 0 WHERE ra = ?"
+SQL_REDEFINIR_SENHA_PROVISORIA = "UPDATE Alunos SET senha_hash = ?, primeiro_acesso = 1 WHERE ra = ?"
+SQL_INSERIR_ALUNO = "INSERT INTO Alunos (ra, nome, email, senha_hash, curso, primeiro_acesso) VALUES (?, ?, ?, ?, ?, 0)"
+# Cadastro pelo professor: sem e-mail e com primeiro acesso pendente
+SQL_INSERIR_ALUNO_PROVISORIO = "INSERT INTO Alunos (ra, nome, email, senha_hash, curso, primeiro_acesso) VALUES (?, ?, NULL, ?, ?, 1)"
+SQL_INSERIR_PROFESSOR = "INSERT INTO Professores (email, nome, senha_hash, materia_principal) VALUES (?, ?, ?, ?)"
+SQL_MATRICULAR_NOTAS = "INSERT INTO Notas (ra_aluno, materia, np1, np2) VALUES (?, ?, 0.0, 0.0)"
+SQL_MATRICULAR_PIM = "INSERT OR IGNORE INTO NotasPIM (ra_aluno, pim) VALUES (?, 0.0)"
+
+# Tamanho dos blocos das listas IN (limite de parâmetros do SQLite); também é a
+# aridade usada no relatório de planos, para refletir a consulta mais comum
+TAMANHO_BLOCO_IN = 500
+_MARCADORES_EXEMPLO = ", ".join("?" * TAMANHO_BLOCO_IN)
+_RAS_EXEMPLO = tuple(f"RA{i:05d}" for i in range(TAMANHO_BLOCO_IN))
+
+# Nome -> (SQL, parâmetros de exemplo) para o relatório de planos de execução
+CONSULTAS_MONITORADAS: typing.Dict[str, tuple[str, tuple]] = {
+    'aluno_existe': (SQL_ALUNO_EXISTE, ('RA00000',)),
+    'ras_existentes': (SQL_RAS_EXISTENTES.format(marcadores=_MARCADORES_EXEMPLO), _RAS_EXEMPLO),
+    'professor_existe': (SQL_PROFESSOR_EXISTE, ('prof@exemplo.com',)),
+    'login_aluno': (SQL_LOGIN_ALUNO, ('RA00000',)),
+    'login_professor': (SQL_LOGIN_PROFESSOR, ('prof@exemplo.com',)),
+    'rehash_aluno': (SQL_REHASH_ALUNO, ('hash_novo', 'RA00000', 'hash')),
+    'rehash_professor': (SQL_REHASH_PROFESSOR, ('hash_novo', 'prof@exemplo.com', 'hash')),
+    'ler_configuracao': (SQL_LER_CONFIGURACAO, ('bcrypt_custo@maquina',)),
+    'gravar_configuracao': (SQL_GRAVAR_CONFIGURACAO, ('bcrypt_custo@maquina', '12')),
+    'alunos_da_materia': (SQL_ALUNOS_DA_MATERIA, (MATERIAS_ADS[1],)),
+    'boletim_turma': (SQL_BOLETIM_TURMA, (MATERIAS_ADS[1],)),
+    'boletim_aluno': (SQL_BOLETIM_ALUNO, ('RA00000',)),
+    'boletim_alunos_da_turma': (SQL_BOLETIM_ALUNOS_DA_TURMA.format(marcadores=_MARCADORES_EXEMPLO),
+                                (MATERIAS_ADS[1], *_RAS_EXEMPLO)),
+    'pagina_turma': _sql_pagina_turma(MATERIAS_ADS[1], 100, apos=('maria', 'RA00000')),
+    'pagina_turma_anterior': _sql_pagina_turma(MATERIAS_ADS[1], 100, antes=('maria', 'RA00000')),
+    'busca_nome_status': _sql_pagina_turma(MATERIAS_ADS[1], 100, busca='mar', status='Em Exame'),
+    'busca_ra': _sql_pagina_turma(MATERIAS_ADS[1], 100, apos=('RA00050',), busca='RA000'),
+    'contar_turma': (SQL_CONTAR_TURMA, (MATERIAS_ADS[1],)),
+    'alunos_por_status': (SQL_ALUNOS_POR_STATUS, (MATERIAS_ADS[1], 2.0, 7.0, 4.0, 7.0)),
+    'contagem_status': (SQL_CONTAGEM_STATUS, ()),
+    'notas_aluno': (SQL_NOTAS_ALUNO, ('RA00000', MATERIAS_ADS[1])),
+    'matricula_existe': (SQL_MATRICULA_EXISTE, ('RA00000', MATERIAS_ADS[1])),
+    'atualizar_notas': (SQL_ATUALIZAR_NOTAS, (7.0, 7.0, 'RA00000', MATERIAS_ADS[1])),
+    'atualizar_colunas_notas': (SQL_ATUALIZAR_COLUNAS_NOTAS.format(colunas="np1 = ?"),
+                                (7.0, 'RA00000', MATERIAS_ADS[1])),
+    'atualizar_pim_aluno': (SQL_ATUALIZAR_PIM_ALUNO, (7.0, 'RA00000')),
+    'alteracoes_turma': (SQL_ALTERACOES_TURMA, (0, 100, MATERIAS_ADS[1])),
+    'alteracoes_aluno': (SQL_ALTERACOES_ALUNO, ('RA00000', 0, 100)),
+    'minima_alteracoes': (SQL_MINIMA_ALTERACOES, ()),
+    'faixa_alteracoes': (SQL_FAIXA_ALTERACOES, ()),
+    'aparar_alteracoes': (SQL_APARAR_ALTERACOES, (100,)),
+    'atualizar_primeiro_acesso': (SQL_ATUALIZAR_PRIMEIRO_ACESSO, ('aluno@exemplo.com', 'hash', 'RA00000')),
+    'redefinir_senha_provisoria': (SQL_REDEFINIR_SENHA_PROVISORIA, ('hash', 'RA00000')),
+    'inserir_aluno': (SQL_INSERIR_ALUNO, ('RA00000', 'Aluno', 'aluno@exemplo.com', 'hash', 'ADS')),
+    'inserir_aluno_provisorio': (SQL_INSERIR_ALUNO_PROVISORIO, ('RA00000', 'Aluno', 'hash', 'ADS')),
+    'inserir_professor': (SQL_INSERIR_PROFESSOR, ('prof@exemplo.com', 'Professor', 'hash', MATERIAS_ADS[1])),
+    'matricular_notas': (SQL_MATRICULAR_NOTAS, ('RA00000', MATERIAS_ADS[1])),
+    'matricular_pim': (SQL_MATRICULAR_PIM, ('RA00000',)),
+}
+
+# --- PERFIS DE DESEMPENHO DO SQLITE ---
+
+@dataclass(frozen=True)
+class PerfilSQLite:
+    """
+    Configuração aplicada (via PRAGMA) a cada conexão aberta pelo GestorBD.
+
+    journal_mode: 'WAL' permite leitores simultâneos a um escritor, mas exige
+                  que todos os processos estejam na mesma máquina (não funciona
+                  com o arquivo em compartilhamento de rede).
+    synchronous:  'NORMAL' em WAL só faz fsync nos checkpoints; 'FULL' a cada commit.
+    mmap_size:    janela de I/O mapeado em memória, em bytes (0 desativa).
+    cache_size:   cache de páginas; valores negativos são em KiB.
+    busy_timeout_ms: tempo que uma conexão espera por um lock antes de falhar.
+    tentativas_escrita: quantas vezes uma transação de escrita é tentada quando
+                  o banco continua bloqueado ("database is locked") após o busy_timeout.
+    espera_inicial_ms: espera antes da 2ª tentativa; dobra a cada nova tentativa.
+    """
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'
+    mmap_size: int = 64 * 1024 * 1024
+    cache_size: int = -16000
+    busy_timeout_ms: int = 5000
+    tentativas_escrita: int = 5
+    espera_inicial_ms: int = 50
+
+PERFIS_SQLITE: typing.Dict[str, PerfilSQLite] = {
+    # Um único usuário com o banco no disco local
+    'desktop': PerfilSQLite(),
+    # Servidor do laboratório: banco local ao servidor, muitos professores ao mesmo tempo
+    'servidor': PerfilSQLite(mmap_size=512 * 1024 * 1024, cache_size=-131072, busy_timeout_ms=15000),
+    # Várias máquinas abrindo o mesmo arquivo em um volume de rede: sem WAL nem mmap
+    'rede_compartilhada': PerfilSQLite(journal_mode='DELETE', synchronous='FULL', mmap_size=0, cache_size=-16000,
+                                       busy_timeout_ms=30000, tentativas_escrita=8, espera_inicial_ms=100),
+}
+PERFIL_SQLITE_PADRAO = 'desktop'
+
+# Linhas por página nas listagens paginadas da turma
+TAMANHO_PAGINA = 100
+
+# Quantas alterações de notas o registro (AlteracoesNotas) mantém
+LIMITE_ALTERACOES = 50000
+
+# Instrumentação: os métodos de hash também são medidos (o bcrypt costuma
+# dominar o login); os context managers não são chamadas a medir.
+METODOS_BCRYPT = ('_hash_senha', '_hash_senhas_lote', '_checar_senha')
+METODOS_NAO_INSTRUMENTADOS = ('sessao', 'transacao', 'fechar_conexao',
+                              'estatisticas_instrumentacao', 'relatorio_instrumentacao')
+
+# Versão do schema gravada em PRAGMA user_version. Aumente a cada mudança em
+# _criar_tabelas: bancos já na versão atual pulam o DDL na inicialização.
+VERSAO_SCHEMA = 2
+
+# Custo (log2 das rodadas) do bcrypt. É calibrado para cada máquina (CLI
+# --calibrar-bcrypt ou na abertura do programa/servidor) e guardado em
+# Configuracoes com o nome da máquina; sem calibração, vale o padrão do
+# bcrypt.gensalt(). O mínimo só limita o resultado da calibração.
+CUSTO_BCRYPT_PADRAO = 12
+CUSTO_BCRYPT_MINIMO = 10
+CUSTO_BCRYPT_MAXIMO = 16
+ALVO_HASH_MS_PADRAO = 250.0
+CONFIG_CUSTO_BCRYPT = 'bcrypt_custo'
+
+# Por quanto tempo um login verificado dispensa o bcrypt ao entrar de novo
+VALIDADE_SESSAO_LOGIN_S = 600.0
+
+# Limite da espera entre tentativas de escrita
+ESPERA_MAXIMA_ESCRITA_S = 2.0
+
+T = typing.TypeVar('T')
+
+
+def _banco_ocupado(erro: sqlite3.OperationalError) -> bool:
+    """Indica se o erro é um SQLITE_BUSY/SQLITE_LOCKED (vale tentar de novo)."""
+    mensagem = str(erro).lower()
+    return "locked" in mensagem or "busy" in mensagem
+
+
+# Abaixo disso o custo de subir os processos supera o ganho do paralelismo
+MIN_SENHAS_HASH_PARALELO = 4
+
+
+def _gerar_hash_bcrypt(senha_limpa: str, custo: int) -> str:
+    """Gera um hash bcrypt. Função de módulo para poder ser enviada aos processos do pool."""
+    import bcrypt  # só no primeiro login/cadastro, não na abertura do programa
+    return bcrypt.hashpw(senha_limpa.encode('utf-8'), bcrypt.gensalt(rounds=custo)).decode('utf-8')
+
+
+def _chave_custo_bcrypt() -> str:
+    """Chave do custo calibrado desta máquina em Configuracoes (o mesmo banco pode ser aberto de várias)."""
+    import platform
+    return f"{CONFIG_CUSTO_BCRYPT}@{platform.node()}"
+
+
+def custo_do_hash(senha_hash: str) -> typing.Optional[int]:
+    """Custo gravado em um hash bcrypt ('$2b$12$...' -> 12); None se o hash não for reconhecido."""
+    partes = senha_hash.split('$')
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def calibrar_custo_bcrypt(alvo_ms: float = ALVO_HASH_MS_PADRAO) -> int:
+    """
+    Maior custo do bcrypt cujo hash, nesta máquina, leva até `alvo_ms`
+    (respeitando CUSTO_BCRYPT_MINIMO e CUSTO_BCRYPT_MAXIMO). Cada ponto de
+    custo dobra o trabalho: mede a partir do mínimo e sobe enquanto o tempo
+    previsto para o próximo custo couber no alvo.
+    """
+    def medir(custo: int) -> float:
+        inicio = time.perf_counter()
+        _gerar_hash_bcrypt("calibracao", custo)
+        return (time.perf_counter() - inicio) * 1000
+
+    custo = CUSTO_BCRYPT_MINIMO
+    # O primeiro hash também paga a importação do bcrypt: fica o menor de duas medições
+    tempo = min(medir(custo), medir(custo))
+    while custo < CUSTO_BCRYPT_MAXIMO and tempo * 2 <= alvo_ms:
+        custo += 1
+        tempo = medir(custo)
+    return custo
+
+
+def _chaves_notas(ra: str, materias: typing.Iterable[str]) -> typing.List[tuple]:
+    """Entradas do cache de leituras afetadas por uma mudança nas notas do aluno nas matérias."""
+    chaves: typing.List[tuple] = [('boletim_aluno', ra)]
+    for materia in materias:
+        chaves += [('notas', ra, materia), ('boletim_turma', materia)]
+    return chaves
+
 
 class GestorBD:
-    def __init__(self, db_name='sistema_academico.db'):
+    def __init__(self, db_name='sistema_academico.db', persistente: bool = True,
+                 perfil: typing.Union[str, PerfilSQLite] = PERFIL_SQLITE_PADRAO,
+                 cache_leituras: int = 0, instrumentar: bool = False,
+                 limite_consulta_lenta_ms: float = 50.0, sessoes_login: int = 0,
+                 validade_sessao_s: float = VALIDADE_SESSAO_LOGIN_S, refazer_hash_no_login: bool = True):
         """
         Inicializa o gestor, apenas definindo o nome do DB. 
         A conexão é estabelecida apenas quando necessária.
+
+        Com persistente=True (padrão) cada thread mantém uma conexão aberta
+        que é reaproveitada entre as chamadas e só é fechada por fechar_conexao().
+        Com persistente=False a conexão é fechada ao fim de cada chamada
+        (ou ao fim do bloco `with gestor.sessao():` mais externo).
+
+        `perfil` é o nome de um dos PERFIS_SQLITE ou um PerfilSQLite próprio.
+
+        `cache_leituras` > 0 liga um cache LRU com essa quantidade de entradas
+        para notas, listas e boletins de turma (nunca para o login). As escritas
+        feitas por este gestor invalidam exatamente as entradas afetadas; use
+        apenas quando nenhum outro processo grava no mesmo banco.
+
+        `instrumentar=True` mede cada método público (e o bcrypt), as aberturas
+        de conexão e registra as consultas acima de `limite_consulta_lenta_ms`;
+        veja relatorio_instrumentacao(). Desligado, não há custo algum.
+
+        `sessoes_login` > 0 guarda, por `validade_sessao_s` segundos, até essa
+        quantidade de logins verificados: quem sai e entra de novo com a mesma
+        senha não paga outro bcrypt. Só fica em memória um HMAC da senha, com
+        chave aleatória deste gestor; trocar a senha encerra a sessão.
+
+        Um login válido com hash de custo menor que o calibrado para a máquina
+        refaz o hash. Com `refazer_hash_no_login=False` o login não grava nada:
+        o novo hash fica pendente até gravar_hashes_pendentes(), para quem
+        concentra as escritas em uma única thread (ex.: servidor.py).
         """
         self.db_name = db_name
-        self.conn: typing.Optional[sqlite3.Connection] = None 
+        self.persistente = persistente
+        if isinstance(perfil, str):
+            if perfil not in PERFIS_SQLITE:
+                raise ValueError(f"Perfil de banco desconhecido: {perfil}. Use um de: {', '.join(PERFIS_SQLITE)}.")
+            perfil = PERFIS_SQLITE[perfil]
+        self.perfil = perfil
+        # Conexões são por thread: sqlite3 não compartilha conexões com segurança
+        self._local = threading.local()
+        self._conexoes_abertas: typing.List[sqlite3.Connection] = []
+        self._lock_conexoes = threading.Lock()
+        # Quantas vezes uma escrita precisou ser repetida por banco bloqueado
+        self.total_retentativas = 0
+        # Cache de leituras (desligado com cache_leituras=0)
+        self.cache_leituras = cache_leituras
+        self._cache: typing.Optional[OrderedDict] = OrderedDict() if cache_leituras > 0 else None
+        self._lock_cache = threading.Lock()
+        # Incrementada a cada invalidação: leituras iniciadas antes dela não entram no cache
+        self._geracao_cache = 0
+        self.cache_acertos = 0
+        self.cache_falhas = 0
+        # Conexões abertas desde a criação do gestor (várias = reconexões a cada chamada)
+        self.total_conexoes = 0
+        # Logins verificados: (tipo, credencial) -> (HMAC da senha, hash conferido, expiração)
+        self.sessoes_login = sessoes_login
+        self.validade_sessao_s = validade_sessao_s
+        self._sessoes: typing.Optional[OrderedDict] = OrderedDict() if sessoes_login > 0 else None
+        self._chave_sessoes = secrets.token_bytes(32)
+        self._lock_sessoes = threading.Lock()
+        # Custo calibrado para esta máquina (lido de Configuracoes no primeiro uso; None = não calibrada)
+        self._custo_bcrypt: typing.Optional[int] = None
+        self._custo_bcrypt_lido = False
+        self.refazer_hash_no_login = refazer_hash_no_login
+        # (tipo, credencial) -> (novo hash, hash verificado), à espera de gravar_hashes_pendentes()
+        self._hashes_pendentes: typing.Dict[tuple[str, str], tuple[str, str]] = {}
+        self._lock_hashes_pendentes = threading.Lock()
+        self.instrumentacao: typing.Optional[InstrumentacaoBD] = None
+        if instrumentar:
+            self.instrumentacao = InstrumentacaoBD(limite_consulta_lenta_ms)
+            self._instrumentar_metodos()
+
+    @property
+    def conn(self) -> typing.Optional[sqlite3.Connection]:
+        """Conexão da thread atual (None se ainda não foi aberta)."""
+        return getattr(self._local, 'conn', None)
         
     def inicializar_db(self):
         """
@@ -22,29 +538,334 @@ class GestorBD:
         """
         self._conectar()
         try:
-            self._criar_tabelas()
+            # A abertura normal só lê a versão; o DDL e as migrações rodam em
+            # bancos novos, antigos ou com a view desatualizada
+            if not self._schema_atualizado():
+                self._criar_tabelas()
+            self._aparar_alteracoes()
         except Exception as e:
             print(f"Erro ao inicializar DB: {e}")
         finally:
-            self.fechar_conexao() 
+            self._liberar_conexao()
 
     def _conectar(self):
-        """Estabelece a conexão com o banco de dados, se não estiver aberta."""
+        """
+        Garante uma conexão aberta para a thread atual e registra mais um nível
+        de uso. Cada chamada deve ser pareada com _liberar_conexao().
+        """
         if self.conn is None:
+            inicio = time.perf_counter()
             try:
-                self.conn = sqlite3.connect(self.db_name)
-                self.conn.row_factory = sqlite3.Row 
+                # check_same_thread=False apenas para que fechar_conexao() possa
+                # fechar, a partir da thread principal, conexões abertas por workers.
+                conn = sqlite3.connect(self.db_name, timeout=self.perfil.busy_timeout_ms / 1000, check_same_thread=False)
+                conn.row_factory = sqlite3.Row 
+                self._aplicar_perfil(conn)
             except sqlite3.Error as e:
                 raise ConnectionError(f"Falha ao conectar ao banco de dados: {e}")
+            self.total_conexoes += 1
+            if self.instrumentacao is not None:
+                self.instrumentacao.registrar_conexao(time.perf_counter() - inicio)
+                conn.set_trace_callback(self.instrumentacao.registrar_sql)
+            self._local.conn = conn
+            self._local.profundidade = 0
+            with self._lock_conexoes:
+                self._conexoes_abertas.append(conn)
+        self._local.profundidade += 1
+
+    def _aplicar_perfil(self, conn: sqlite3.Connection):
+        """Aplica o PerfilSQLite do gestor a uma conexão recém-aberta."""
+        perfil = self.perfil
+        conn.execute(f"PRAGMA busy_timeout = {int(perfil.busy_timeout_ms)}")
+        modo_atual = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if modo_atual.upper() != perfil.journal_mode.upper():
+            # Trocar o modo de journal exige acesso exclusivo ao arquivo; se outro
+            # processo estiver com o banco aberto, segue no modo atual.
+            try:
+                conn.execute(f"PRAGMA journal_mode = {perfil.journal_mode}")
+            except sqlite3.OperationalError as e:
+                print(f"Aviso: não foi possível mudar o journal_mode para {perfil.journal_mode}: {e}")
+        conn.execute(f"PRAGMA synchronous = {perfil.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {int(perfil.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {int(perfil.cache_size)}")
+
+    def _liberar_conexao(self):
+        """
+        Encerra um nível de uso da conexão da thread atual. No modo não
+        persistente a conexão é fechada quando o último nível é liberado.
+        """
+        if self.conn is None:
+            return
+        self._local.profundidade = max(0, self._local.profundidade - 1)
+        if self._local.profundidade == 0 and not self.persistente:
+            self._fechar_conexao_thread()
+
+    def _fechar_conexao_thread(self):
+        """Fecha a conexão da thread atual."""
+        conn = self.conn
+        if conn is None:
+            return
+        with self._lock_conexoes:
+            if conn in self._conexoes_abertas:
+                self._conexoes_abertas.remove(conn)
+        conn.close()
+        self._local.conn = None
+        self._local.profundidade = 0
+
+    @contextlib.contextmanager
+    def sessao(self) -> typing.Iterator[sqlite3.Connection]:
+        """
+        Agrupa várias chamadas sobre a mesma conexão.
+
+        Uso:
+            with gestor.sessao():
+                gestor.buscar_notas_aluno(ra, materia)
+                gestor.lancar_nota(ra, materia, 'NP1', 8.0)
+        """
+        self._conectar()
+        try:
+            yield self.conn
+        finally:
+            self._liberar_conexao()
+
+    @contextlib.contextmanager
+    def transacao(self) -> typing.Iterator[sqlite3.Cursor]:
+        """
+        Executa um bloco de escritas em uma única transação: commit ao final,
+        rollback se qualquer exceção for lançada dentro do bloco. Blocos
+        aninhados fazem parte da transação do bloco mais externo.
+
+        A transação começa com BEGIN IMMEDIATE, reservando o lock de escrita
+        logo no início: dois processos nunca leem o mesmo dado para depois
+        disputarem a escrita. Para repetir automaticamente quando o banco
+        estiver bloqueado, use _executar_escrita().
+        """
+        self._conectar()
+        # Transações aninhadas participam da transação mais externa
+        externa = getattr(self._local, 'em_transacao', False) is False
+        self._local.em_transacao = True
+        try:
+            cursor = self.conn.cursor()
+            if externa:
+                cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+                if externa:
+                    self.conn.commit()
+            except BaseException:
+                if externa:
+                    self.conn.rollback()
+                raise
+        finally:
+            if externa:
+                self._local.em_transacao = False
+                # Invalida de novo após o commit: outra thread pode ter lido (e
+                # guardado) o valor antigo enquanto a transação estava aberta
+                pendentes = getattr(self._local, 'invalidacoes_pendentes', None)
+                if pendentes:
+                    self._local.invalidacoes_pendentes = []
+                    self._invalidar_cache(pendentes)
+            self._liberar_conexao()
+
+    def _executar_escrita(self, operacao: typing.Callable[[sqlite3.Cursor], T]) -> T:
+        """
+        Executa operacao(cursor) dentro de transacao(). Se o banco estiver
+        bloqueado por outro processo mesmo após o busy_timeout, desfaz e tenta
+        de novo com espera exponencial (com jitter), até perfil.tentativas_escrita.
+        Dentro de uma transação já aberta, a operação roda uma única vez.
+        """
+        if getattr(self._local, 'em_transacao', False):
+            with self.transacao() as cursor:
+                return operacao(cursor)
+
+        tentativa = 1
+        espera = self.perfil.espera_inicial_ms / 1000
+        while True:
+            try:
+                with self.transacao() as cursor:
+                    return operacao(cursor)
+            except sqlite3.OperationalError as e:
+                if not _banco_ocupado(e) or tentativa >= self.perfil.tentativas_escrita:
+                    raise
+            self.total_retentativas += 1
+            time.sleep(min(espera, ESPERA_MAXIMA_ESCRITA_S) * random.uniform(0.5, 1.5))
+            espera *= 2
+            tentativa += 1
+
+    # -----------------------------------------------
+    # CACHE DE LEITURAS
+    # -----------------------------------------------
+
+    def _ler_com_cache(self, chave: tuple, carregar: typing.Callable[[], T]) -> T:
+        """
+        Devolve o valor em cache para `chave` ou executa carregar() e o guarda.
+        Valores guardados devem ser imutáveis (tuplas). Leituras dentro de uma
+        transação não são guardadas, pois podem enxergar dados ainda não confirmados.
+        """
+        if self._cache is None:
+            return carregar()
+        with self._lock_cache:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                self.cache_acertos += 1
+                return self._cache[chave]
+            self.cache_falhas += 1
+            geracao = self._geracao_cache
+
+        valor = carregar()
+
+        if not getattr(self._local, 'em_transacao', False):
+            with self._lock_cache:
+                if geracao == self._geracao_cache:
+                    self._cache[chave] = valor
+                    self._cache.move_to_end(chave)
+                    while len(self._cache) > self.cache_leituras:
+                        self._cache.popitem(last=False)
+        return valor
+
+    def _invalidar_cache(self, chaves: typing.Iterable[tuple]):
+        """
+        Remove as entradas do cache. Chamado de dentro das escritas: a remoção
+        é imediata e repetida quando a transação mais externa termina.
+        """
+        if self._cache is None:
+            return
+        chaves = list(chaves)
+        with self._lock_cache:
+            self._geracao_cache += 1
+            for chave in chaves:
+                self._cache.pop(chave, None)
+        if getattr(self._local, 'em_transacao', False):
+            if not hasattr(self._local, 'invalidacoes_pendentes'):
+                self._local.invalidacoes_pendentes = []
+            self._local.invalidacoes_pendentes.extend(chaves)
+
+    def limpar_cache(self):
+        """Descarta todo o cache de leituras (ex.: após alterações feitas por outro processo)."""
+        if self._cache is None:
+            return
+        with self._lock_cache:
+            self._geracao_cache += 1
+            self._cache.clear()
+
+    def estatisticas_cache(self) -> typing.Dict[str, typing.Union[int, float]]:
+        """Acertos, falhas, taxa de acerto e ocupação do cache de leituras."""
+        with self._lock_cache:
+            consultas = self.cache_acertos + self.cache_falhas
+            return {
+                'acertos': self.cache_acertos,
+                'falhas': self.cache_falhas,
+                'taxa_acerto': self.cache_acertos / consultas if consultas else 0.0,
+                'entradas': len(self._cache) if self._cache is not None else 0,
+                'capacidade': self.cache_leituras,
+            }
+
+    # -----------------------------------------------
+    # SESSÕES DE LOGIN
+    # -----------------------------------------------
+
+    def _resumo_senha(self, senha_limpa: str) -> bytes:
+        return hmac.new(self._chave_sessoes, senha_limpa.encode('utf-8'), hashlib.sha256).digest()
+
+    def _sessao_valida(self, tipo: str, credencial: str, senha_limpa: str, senha_hash: str) -> bool:
+        """
+        Indica se a mesma senha foi verificada há pouco para este usuário e o
+        hash no banco ainda é o que foi conferido (senha não trocada desde então).
+        `senha_hash` precisa ter sido lido do banco neste login (nunca de um
+        cache): é ele que encerra a sessão quando a senha muda em outro processo.
+        """
+        if self._sessoes is None:
+            return False
+        with self._lock_sessoes:
+            sessao = self._sessoes.get((tipo, credencial))
+            if sessao is None:
+                return False
+            resumo, hash_conferido, expira = sessao
+            if time.monotonic() >= expira or hash_conferido != senha_hash:
+                del self._sessoes[(tipo, credencial)]
+                return False
+        return hmac.compare_digest(resumo, self._resumo_senha(senha_limpa))
+
+    def _abrir_sessao(self, tipo: str, credencial: str, senha_limpa: str, senha_hash: str):
+        """Guarda um login recém-verificado, descartando o mais antigo se passar de sessoes_login."""
+        if self._sessoes is None:
+            return
+        sessao = (self._resumo_senha(senha_limpa), senha_hash, time.monotonic() + self.validade_sessao_s)
+        with self._lock_sessoes:
+            self._sessoes[(tipo, credencial)] = sessao
+            self._sessoes.move_to_end((tipo, credencial))
+            while len(self._sessoes) > self.sessoes_login:
+                self._sessoes.popitem(last=False)
+
+    def _encerrar_sessoes(self, tipo: str, credenciais: typing.Iterable[str]):
+        """Descarta as sessões dos usuários cuja senha foi trocada."""
+        if self._sessoes is None:
+            return
+        with self._lock_sessoes:
+            for credencial in credenciais:
+                self._sessoes.pop((tipo, credencial), None)
+
+    def limpar_sessoes(self):
+        """Descarta todas as sessões de login (o próximo login de cada usuário volta a usar o bcrypt)."""
+        if self._sessoes is None:
+            return
+        with self._lock_sessoes:
+            self._sessoes.clear()
+
+    def _verificar_senha(self, tipo: str, credencial: str, senha_limpa: str, senha_hash: str) -> bool:
+        """
+        Confere a senha pela sessão aberta ou, se não houver, pelo bcrypt (abrindo
+        a sessão). `senha_hash` vem de _buscar_dados_login, lido do banco a cada login.
+        """
+        if self._sessao_valida(tipo, credencial, senha_limpa, senha_hash):
+            return True
+        if not self._checar_senha(senha_limpa, senha_hash):
+            return False
+        senha_hash = self._refazer_hash_se_necessario(tipo, credencial, senha_limpa, senha_hash)
+        self._abrir_sessao(tipo, credencial, senha_limpa, senha_hash)
+        return True
+
+    # -----------------------------------------------
+    # INSTRUMENTAÇÃO
+    # -----------------------------------------------
+
+    def _instrumentar_metodos(self):
+        """Troca, nesta instância, os métodos públicos e os de bcrypt por versões medidas."""
+        for nome, funcao in inspect.getmembers(type(self), inspect.isfunction):
+            if nome in METODOS_BCRYPT:
+                rotulo = f"bcrypt.{nome}"
+            elif nome.startswith('_') or nome in METODOS_NAO_INSTRUMENTADOS:
+                continue
+            else:
+                rotulo = nome
+            setattr(self, nome, self.instrumentacao.medir(rotulo, getattr(self, nome)))
+
+    def estatisticas_instrumentacao(self) -> typing.Optional[dict]:
+        """Medições por método, conexões e consultas lentas (None sem instrumentar=True)."""
+        if self.instrumentacao is None:
+            return None
+        return self.instrumentacao.estatisticas()
+
+    def relatorio_instrumentacao(self) -> str:
+        """Relatório legível das medições (ou um aviso, se a instrumentação estiver desligada)."""
+        if self.instrumentacao is None:
+            return "Instrumentação desligada (crie o GestorBD com instrumentar=True)."
+        return self.instrumentacao.relatorio()
 
     def fechar_conexao(self):
-        """Fecha a conexão com o banco de dados."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """
+        Fecha todas as conexões abertas pelo gestor (em qualquer thread). As
+        threads que usam o gestor precisam ter terminado antes: uma conexão
+        fechada no meio de uma chamada perde a transação em andamento.
+        """
+        with self._lock_conexoes:
+            conexoes, self._conexoes_abertas = self._conexoes_abertas, []
+        for conn in conexoes:
+            conn.close()
+        self._local = threading.local()
 
     def _criar_tabelas(self):
-        """Cria as tabelas Alunos, Professores e Notas se não existirem."""
+        """Cria as tabelas Alunos, Professores e Notas (e seus índices) se não existirem."""
         cursor = self.conn.cursor()
         
         # Tabela Alunos
@@ -70,30 +891,337 @@ class GestorBD:
         """)
 
         # Tabela Notas (Relacionamento Aluno-Matéria)
+        cursor.execute(_ddl_notas("Notas"))
+
+        # PIM: nota única por aluno, vale para todas as matérias
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Notas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ra_aluno TEXT NOT NULL,
-                materia TEXT NOT NULL,
-                np1 REAL DEFAULT 0.0,
-                np2 REAL DEFAULT 0.0,
+            CREATE TABLE IF NOT EXISTS NotasPIM (
+                ra_aluno TEXT PRIMARY KEY,
                 pim REAL DEFAULT 0.0,
-                FOREIGN KEY (ra_aluno) REFERENCES Alunos(ra) ON DELETE CASCADE, 
-                UNIQUE (ra_aluno, materia)
+                FOREIGN KEY (ra_aluno) REFERENCES Alunos(ra) ON DELETE CASCADE
+            )
+        """)
+
+        # Bancos antigos guardavam uma cópia do PIM em cada linha de Notas
+        colunas_notas = {row['name'] for row in cursor.execute("PRAGMA table_xinfo(Notas)")}
+        if 'pim' in colunas_notas:
+            self._migrar_pim_por_aluno()
+        elif not self._notas_atualizada():
+            # Os pesos de NP1/NP2 mudaram: a coluna gerada media_parcial precisa ser recriada
+            with self.transacao() as cursor_migracao:
+                cursor_migracao.execute("DROP VIEW IF EXISTS BoletimNotas")
+                self._recriar_notas(cursor_migracao)
+
+        # O índice implícito de UNIQUE (ra_aluno, materia) começa pelo RA; as
+        # listagens por matéria precisam de um índice que comece pela matéria.
+        # Ele cobre as notas para que o boletim da turma não consulte a tabela.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_notas_materia
+            ON Notas (materia, ra_aluno, np1, np2)
+        """)
+
+        # Listagens por nome e busca por prefixo do nome (sem distinção de maiúsculas)
+        cursor.execute("DROP INDEX IF EXISTS idx_alunos_nome")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alunos_busca ON Alunos (nome COLLATE NOCASE, ra)")
+
+        # A parte da média que não depende do PIM (coluna gerada media_parcial)
+        # é indexada por matéria; filtros por status usam esse índice.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notas_materia_parcial ON Notas (materia, media_parcial)")
+
+        # A view é recriada sempre que o DDL roda; _schema_atualizado também
+        # a compara com as constantes atuais da CalculadoraAcademica
+        cursor.execute("DROP VIEW IF EXISTS BoletimNotas")
+        cursor.execute(_ddl_boletim_notas())
+
+        # Registro de alterações das notas, preenchido por triggers (vale também
+        # para gravações de outros processos). materia NULL = mudança no PIM,
+        # que afeta o aluno em todas as matérias.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS AlteracoesNotas (
+                versao INTEGER PRIMARY KEY AUTOINCREMENT,
+                ra_aluno TEXT NOT NULL,
+                materia TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alteracoes_ra ON AlteracoesNotas (ra_aluno, versao)")
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_notas_inclusao AFTER INSERT ON Notas
+            BEGIN
+                INSERT INTO AlteracoesNotas (ra_aluno, materia) VALUES (NEW.ra_aluno, NEW.materia);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_notas_alteracao AFTER UPDATE OF np1, np2 ON Notas
+            WHEN OLD.np1 IS NOT NEW.np1 OR OLD.np2 IS NOT NEW.np2
+            BEGIN
+                INSERT INTO AlteracoesNotas (ra_aluno, materia) VALUES (NEW.ra_aluno, NEW.materia);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_notas_exclusao AFTER DELETE ON Notas
+            BEGIN
+                INSERT INTO AlteracoesNotas (ra_aluno, materia) VALUES (OLD.ra_aluno, OLD.materia);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_pim_alteracao AFTER UPDATE OF pim ON NotasPIM
+            WHEN OLD.pim IS NOT NEW.pim
+            BEGIN
+                INSERT INTO AlteracoesNotas (ra_aluno, materia) VALUES (NEW.ra_aluno, NULL);
+            END
+        """)
+
+        # Ajustes guardados no próprio banco. Os que dependem do hardware (ex.:
+        # custo do bcrypt calibrado) usam chaves com o nome da máquina
+        # ("chave@máquina"), para que cada computador que abre o arquivo tenha o seu
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Configuracoes (
+                chave TEXT PRIMARY KEY,
+                valor TEXT NOT NULL
             )
         """)
         
+        cursor.execute(f"PRAGMA user_version = {VERSAO_SCHEMA}")
         self.conn.commit()
 
+    def _schema_atualizado(self) -> bool:
+        """
+        Indica se o banco já está na VERSAO_SCHEMA, com a view e a coluna gerada
+        media_parcial de acordo com as constantes atuais da CalculadoraAcademica.
+        """
+        cursor = self.conn.cursor()
+        if cursor.execute("PRAGMA user_version").fetchone()[0] != VERSAO_SCHEMA:
+            return False
+        view = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = 'BoletimNotas'").fetchone()
+        return view is not None and view[0] == _ddl_boletim_notas() and self._notas_atualizada()
+
+    def _notas_atualizada(self) -> bool:
+        """Indica se a coluna gerada media_parcial da tabela Notas usa os pesos atuais de NP1 e NP2."""
+        tabela = self.conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'Notas'").fetchone()
+        return tabela is not None and f"GENERATED ALWAYS AS ({_expressao_parcial()})" in tabela[0]
+
+    def _recriar_notas(self, cursor: sqlite3.Cursor):
+        """
+        Recria a tabela Notas com o DDL atual, copiando as notas. Os índices e
+        triggers da tabela antiga caem com ela e são recriados por _criar_tabelas.
+        """
+        cursor.execute(_ddl_notas("Notas_nova"))
+        cursor.execute("INSERT INTO Notas_nova (id, ra_aluno, materia, np1, np2) SELECT id, ra_aluno, materia, np1, np2 FROM Notas")
+        cursor.execute("DROP TABLE Notas")
+        cursor.execute("ALTER TABLE Notas_nova RENAME TO Notas")
+
+    def _aparar_alteracoes(self):
+        """Mantém só as alterações mais recentes; quem estiver mais atrasado recarrega tudo."""
+        cursor = self.conn.cursor()
+        # MIN/MAX da chave primária são lidos direto do índice; só grava se passou do limite
+        minimo, maximo = cursor.execute(SQL_FAIXA_ALTERACOES).fetchone()
+        if maximo is not None and maximo - minimo >= LIMITE_ALTERACOES:
+            cursor.execute(SQL_APARAR_ALTERACOES, (maximo - LIMITE_ALTERACOES,))
+            self.conn.commit()
+
+    def _migrar_pim_por_aluno(self):
+        """
+        Migra bancos em que o PIM era replicado em todas as linhas de Notas:
+        o valor da matéria PIM_MATERIA (ou, na falta dela, o maior PIM do
+        aluno) vai para NotasPIM e a tabela Notas é recriada sem a coluna.
+        Tudo em uma única transação.
+        """
+        with self.transacao() as cursor:
+            cursor.execute("DROP VIEW IF EXISTS BoletimNotas")
+            cursor.execute(
+                "INSERT OR IGNORE INTO NotasPIM (ra_aluno, pim) SELECT ra_aluno, pim FROM Notas WHERE materia = ?",
+                (PIM_MATERIA,)
+            )
+            cursor.execute("INSERT OR IGNORE INTO NotasPIM (ra_aluno, pim) SELECT ra_aluno, MAX(pim) FROM Notas GROUP BY ra_aluno")
+            cursor.execute("INSERT OR IGNORE INTO NotasPIM (ra_aluno, pim) SELECT ra, 0.0 FROM Alunos")
+
+            # SQLite não remove colunas indexadas: recria a tabela e copia os dados
+            self._recriar_notas(cursor)
+
+    # -----------------------------------------------
+    # DIAGNÓSTICO
+    # -----------------------------------------------
+
+    def explicar_consultas(self) -> typing.Dict[str, typing.List[str]]:
+        """
+        Executa EXPLAIN QUERY PLAN para cada consulta de CONSULTAS_MONITORADAS
+        e retorna {nome: [linhas do plano]}.
+        """
+        self._conectar()
+        try:
+            cursor = self.conn.cursor()
+            planos = {}
+            for nome, (sql, params) in CONSULTAS_MONITORADAS.items():
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                planos[nome] = [row['detail'] for row in cursor.fetchall()]
+            return planos
+        finally:
+            self._liberar_conexao()
+
+    def relatorio_planos(self) -> str:
+        """
+        Texto com o plano de cada consulta. Passos que varrem uma tabela inteira
+        (SCAN sem índice) são marcados com '!!' para destacar regressões.
+        """
+        linhas = []
+        for nome, plano in self.explicar_consultas().items():
+            linhas.append(f"[{nome}]")
+            for detalhe in plano:
+                # "SCAN CONSTANT ROW" é o SELECT sem FROM, não uma varredura de tabela
+                varredura = detalhe.startswith("SCAN") and "INDEX" not in detalhe and detalhe != "SCAN CONSTANT ROW"
+                linhas.append(f"  {'!!' if varredura else '  '} {detalhe}")
+        return "\n".join(linhas)
+
+    def conferir_status(self, amostras: int = 200000, semente: int = 0) -> typing.List[tuple[float, float, float, str, str]]:
+        """
+        Confere o status calculado pelo SQLite (a mesma expressão da view
+        BoletimNotas e os limites de FAIXAS_STATUS) contra
+        CalculadoraAcademica.calcular_ms. As notas são `amostras` trios sorteados
+        com 3 casas mais as vizinhanças de NOTA_EXAME_MIN e NOTA_APROVACAO.
+        Devolve as divergências: (np1, np2, pim, status no SQL, status no Python).
+        """
+        calc = CalculadoraAcademica()
+        rng = random.Random(semente)
+        trios = [tuple(rng.randint(0, 10000) / 1000 for _ in range(3)) for _ in range(amostras)]
+        for nota in (calc.NOTA_EXAME_MIN, calc.NOTA_APROVACAO):
+            trios += [(n / 1000, n / 1000, n / 1000) for n in range(int(nota * 1000) - 100, int(nota * 1000) + 100)]
+            vizinho = calc.menor_ms_bruta(nota)
+            for _ in range(4):
+                vizinho = math.nextafter(vizinho, -math.inf)
+            for _ in range(8):
+                trios.append((vizinho, vizinho, vizinho))
+                vizinho = math.nextafter(vizinho, math.inf)
+
+        ms = _expressao_ms(f"({_expressao_parcial('?1', '?2')})", '?3')
+        sql = f"SELECT {_expressao_status(ms)}, {ms}"
+        divergencias = []
+        self._conectar()
+        try:
+            cursor = self.conn.cursor()
+            for np1, np2, pim in trios:
+                status_sql, ms_bruta = cursor.execute(sql, (np1, np2, pim)).fetchone()
+                _, status_python, _ = calc.calcular_ms(np1, np2, pim)
+                # Os filtros por status usam FAIXAS_STATUS sobre a mesma MS bruta
+                faixa = next(nome for nome, (minimo, maximo) in FAIXAS_STATUS.items()
+                             if (minimo is None or ms_bruta >= minimo) and (maximo is None or ms_bruta < maximo))
+                if status_sql != status_python or faixa != status_python:
+                    divergencias.append((np1, np2, pim, status_sql if status_sql != status_python else faixa, status_python))
+        finally:
+            self._liberar_conexao()
+        return divergencias
+
     def _hash_senha(self, senha_limpa: str) -> str:
         """Gera o hash da senha usando bcrypt."""
         if not senha_limpa:
             raise ValueError("A senha não pode ser vazia.")
             
-        return bcrypt.hashpw(senha_limpa.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        return _gerar_hash_bcrypt(senha_limpa, self.custo_bcrypt())
+
+    def _hash_senhas_lote(self, senhas: typing.Sequence[str]) -> typing.List[str]:
+        """
+        Gera os hashes de várias senhas, na mesma ordem, distribuindo o bcrypt
+        (limitado pela CPU) entre processos, um por núcleo da máquina.
+        """
+        if any(not senha for senha in senhas):
+            raise ValueError("A senha não pode ser vazia.")
+
+        custo = self.custo_bcrypt()
+        trabalhadores = min(os.cpu_count() or 1, len(senhas))
+        if trabalhadores < 2 or len(senhas) < MIN_SENHAS_HASH_PARALELO:
+            return [_gerar_hash_bcrypt(senha, custo) for senha in senhas]
+
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=trabalhadores) as pool:
+            return list(pool.map(_gerar_hash_bcrypt, senhas, [custo] * len(senhas),
+                                 chunksize=max(1, len(senhas) // (trabalhadores * 4))))
+
+    def custo_calibrado(self) -> typing.Optional[int]:
+        """Custo do bcrypt calibrado para esta máquina, ou None se ela ainda não foi calibrada."""
+        if not self._custo_bcrypt_lido:
+            valor = self.ler_configuracao(_chave_custo_bcrypt())
+            if valor is not None and valor.isdigit():
+                self._custo_bcrypt = max(CUSTO_BCRYPT_MINIMO, int(valor))
+            self._custo_bcrypt_lido = True
+        return self._custo_bcrypt
+
+    def custo_bcrypt(self) -> int:
+        """
+        Custo do bcrypt usado nos novos hashes: o calibrado para esta máquina ou,
+        sem calibração, CUSTO_BCRYPT_PADRAO. Nunca calibra aqui, para que um
+        login ou cadastro não pague a medição.
+        """
+        return self.custo_calibrado() or CUSTO_BCRYPT_PADRAO
+
+    def calibrar_bcrypt(self, alvo_ms: float = ALVO_HASH_MS_PADRAO) -> int:
+        """
+        Calibra o custo do bcrypt para `alvo_ms` nesta máquina e o guarda em
+        Configuracoes com o nome dela. Leva alguns segundos: chame na instalação
+        ou na abertura do programa, nunca durante um login. Os hashes de custo
+        menor são refeitos no próximo login de cada usuário.
+        """
+        custo = calibrar_custo_bcrypt(alvo_ms)
+        self.definir_custo_bcrypt(custo)
+        return custo
+
+    def definir_custo_bcrypt(self, custo: int):
+        """Guarda `custo` como o custo calibrado desta máquina (ex.: bancos de teste, sem medir)."""
+        custo = max(CUSTO_BCRYPT_MINIMO, min(custo, CUSTO_BCRYPT_MAXIMO))
+        self.gravar_configuracao(_chave_custo_bcrypt(), str(custo))
+        self._custo_bcrypt = custo
+        self._custo_bcrypt_lido = True
+
+    def _refazer_hash_se_necessario(self, tipo: str, credencial: str, senha_limpa: str, senha_hash: str) -> str:
+        """
+        Depois de um login válido, refaz o hash se o custo dele for menor que o
+        calibrado para esta máquina. Só sobe o custo: máquinas mais lentas que
+        abrem o mesmo banco não enfraquecem (nem ficam refazendo) os hashes das
+        mais rápidas. Devolve o hash que ficou no banco. Uma falha aqui não
+        impede o login: o hash antigo continua válido.
+        """
+        custo = self.custo_calibrado()
+        atual = custo_do_hash(senha_hash)
+        if custo is None or atual is None or atual >= custo:
+            return senha_hash
+        novo_hash = self._hash_senha(senha_limpa)
+        if not self.refazer_hash_no_login:
+            with self._lock_hashes_pendentes:
+                self._hashes_pendentes[(tipo, credencial)] = (novo_hash, senha_hash)
+            return senha_hash
+        # rowcount 0: a senha foi trocada entre a leitura e a gravação
+        return novo_hash if self._gravar_hashes({(tipo, credencial): (novo_hash, senha_hash)}) else senha_hash
+
+    @property
+    def hashes_pendentes(self) -> bool:
+        """Indica se há hashes refeitos no login esperando gravar_hashes_pendentes()."""
+        return bool(self._hashes_pendentes)
+
+    def gravar_hashes_pendentes(self) -> int:
+        """
+        Grava, em uma única escrita, os hashes refeitos nos logins com
+        refazer_hash_no_login=False. Devolve quantos foram gravados.
+        """
+        with self._lock_hashes_pendentes:
+            pendentes, self._hashes_pendentes = self._hashes_pendentes, {}
+        return self._gravar_hashes(pendentes) if pendentes else 0
+
+    def _gravar_hashes(self, hashes: typing.Dict[tuple[str, str], tuple[str, str]]) -> int:
+        def gravar(cursor: sqlite3.Cursor) -> int:
+            gravados = 0
+            for (tipo, credencial), (novo_hash, senha_hash) in hashes.items():
+                sql = SQL_REHASH_ALUNO if tipo == 'aluno' else SQL_REHASH_PROFESSOR
+                cursor.execute(sql, (novo_hash, credencial, senha_hash))
+                gravados += cursor.rowcount
+            return gravados
+
+        try:
+            return self._executar_escrita(gravar)
+        except sqlite3.Error as e:
+            print(f"Aviso: não foi possível atualizar o hash de {len(hashes)} senha(s): {e}")
+            return 0
 
     def _checar_senha(self, senha_limpa: str, senha_hash: str) -> bool:
         """Verifica se a senha limpa corresponde ao hash armazenado."""
+        import bcrypt
         try:
             return bcrypt.checkpw(senha_limpa.encode('utf-8'), senha_hash.encode('utf-8'))
         except ValueError:
@@ -110,37 +1238,63 @@ class GestorBD:
     # -----------------------------------------------
     
     def _executar_busca(self, sql: str, params: tuple) -> typing.Optional[sqlite3.Row]:
-        """Método auxiliar para executar buscas simples e fechar a conexão."""
+        """Método auxiliar para executar buscas simples e liberar a conexão."""
         self._conectar()
         try:
             cursor = self.conn.cursor()
             cursor.execute(sql, params)
             return cursor.fetchone()
         finally:
-            self.fechar_conexao()
+            self._liberar_conexao()
+
+    def _executar_busca_todos(self, sql: str, params: tuple) -> typing.List[sqlite3.Row]:
+        """Como _executar_busca, mas devolve todas as linhas."""
+        self._conectar()
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            self._liberar_conexao()
 
     def buscar_aluno_por_ra(self, ra: str) -> bool:
-        return self._executar_busca("SELECT 1 FROM Alunos WHERE ra = ?", (ra.upper(),)) is not None
+        return self._executar_busca(SQL_ALUNO_EXISTE, (ra.upper(),)) is not None
             
     def buscar_professor_por_email(self, email: str) -> bool:
-        return self._executar_busca("SELECT 1 FROM Professores WHERE email = ?", (email.lower(),)) is not None
+        return self._executar_busca(SQL_PROFESSOR_EXISTE, (email.lower(),)) is not None
+
+    def ler_configuracao(self, chave: str) -> typing.Optional[str]:
+        """Valor guardado em Configuracoes para `chave`, ou None."""
+        linha = self._executar_busca(SQL_LER_CONFIGURACAO, (chave,))
+        return linha['valor'] if linha else None
+
+    def gravar_configuracao(self, chave: str, valor: str):
+        """Grava (ou substitui) `chave` em Configuracoes."""
+        self._executar_escrita(lambda cursor: cursor.execute(SQL_GRAVAR_CONFIGURACAO, (chave, valor)))
 
     # -----------------------------------------------
     # MÉTODOS DE CADASTRO E LOGIN
     # -----------------------------------------------
 
+    def _buscar_dados_login(self, tipo: str, credencial: str) -> typing.Optional[dict]:
+        """
+        Linha de login (com o hash da senha) do aluno pelo RA ou do professor pelo e-mail.
+        Sempre lida do banco, fora do cache de leituras: a senha pode ter sido
+        trocada por outro processo, e a busca é uma só pela chave primária.
+        """
+        sql = SQL_LOGIN_ALUNO if tipo == 'aluno' else SQL_LOGIN_PROFESSOR
+        linha = self._executar_busca(sql, (credencial,))
+        return dict(linha) if linha else None
+
     def buscar_login(self, credencial: str, senha_limpa: str, tipo: str) -> typing.Optional[dict]:
         """Busca o usuário e verifica a senha para o login."""
-        self._conectar()
         try:
-            cursor = self.conn.cursor()
             usuario_data = None
             
             if tipo == 'aluno':
-                cursor.execute("SELECT ra, nome, senha_hash, curso, primeiro_acesso, email FROM Alunos WHERE ra = ?", (credencial.upper(),))
-                usuario_data = cursor.fetchone()
+                usuario_data = self._buscar_dados_login('aluno', credencial.upper())
                 
-                if usuario_data and self._checar_senha(senha_limpa, usuario_data['senha_hash']):
+                if usuario_data and self._verificar_senha('aluno', usuario_data['ra'], senha_limpa, usuario_data['senha_hash']):
                     return {
                         'ra': usuario_data['ra'],
                         'nome': usuario_data['nome'],
@@ -151,10 +1305,9 @@ class GestorBD:
                     }
                 
             elif tipo == 'professor':
-                cursor.execute("SELECT email, nome, senha_hash, materia_principal FROM Professores WHERE email = ?", (credencial.lower(),))
-                usuario_data = cursor.fetchone()
+                usuario_data = self._buscar_dados_login('professor', credencial.lower())
                 
-                if usuario_data and self._checar_senha(senha_limpa, usuario_data['senha_hash']):
+                if usuario_data and self._verificar_senha('professor', usuario_data['email'], senha_limpa, usuario_data['senha_hash']):
                     return {
                         'email': usuario_data['email'],
                         'nome': usuario_data['nome'],
@@ -167,44 +1320,39 @@ class GestorBD:
         except sqlite3.Error as e:
             print(f"Erro ao buscar login: {e}") 
             return None
-        finally:
-            self.fechar_conexao()
 
     def adicionar_usuario(self, usuario: typing.Union[Aluno, Professor], senha_limpa: str) -> tuple[bool, str]:
         """Adiciona um novo aluno ou professor ao banco de dados."""
-        self._conectar()
-        
         try:
-            senha_hash = self._hash_senha(senha_limpa)
-            cursor = self.conn.cursor()
-            
             if isinstance(usuario, Aluno):
                 if not usuario.email or not self._validar_email(usuario.email): 
                     return False, "O e-mail é obrigatório e precisa ter um formato válido."
-                    
-                cursor.execute(
-                    "INSERT INTO Alunos (ra, nome, email, senha_hash, curso, primeiro_acesso) VALUES (?, ?, ?, ?, ?, 0)",
-                    (usuario.ra.upper(), usuario.nome, usuario.email.lower(), senha_hash, usuario.curso)
-                )
-                
-                for materia in MATERIAS_ADS:
+
+                # O bcrypt roda antes da transação para não segurar o lock de escrita
+                senha_hash = self._hash_senha(senha_limpa)
+
+                def inserir_aluno(cursor: sqlite3.Cursor):
                     cursor.execute(
-                        "INSERT INTO Notas (ra_aluno, materia, np1, np2, pim) VALUES (?, ?, ?, ?, ?)",
-                        (usuario.ra.upper(), materia, 0.0, 0.0, 0.0)
+                        SQL_INSERIR_ALUNO,
+                        (usuario.ra.upper(), usuario.nome, usuario.email.lower(), senha_hash, usuario.curso)
                     )
+                    self._matricular(cursor, [usuario.ra.upper()])
 
-                self.conn.commit()
+                self._executar_escrita(inserir_aluno)
                 return True, "Aluno cadastrado com sucesso!"
                 
             elif isinstance(usuario, Professor):
                 if not self._validar_email(usuario.email):
                     return False, "O e-mail do professor precisa ter um formato válido."
-                
-                cursor.execute(
-                    "INSERT INTO Professores (email, nome, senha_hash, materia_principal) VALUES (?, ?, ?, ?)",
-                    (usuario.email.lower(), usuario.nome, senha_hash, usuario.materia_principal)
-                )
-                self.conn.commit()
+
+                senha_hash = self._hash_senha(senha_limpa)
+                def inserir_professor(cursor: sqlite3.Cursor):
+                    cursor.execute(
+                        SQL_INSERIR_PROFESSOR,
+                        (usuario.email.lower(), usuario.nome, senha_hash, usuario.materia_principal)
+                    )
+
+                self._executar_escrita(inserir_professor)
                 return True, "Professor cadastrado com sucesso!"
                 
             return False, "Tipo de usuário inválido."
@@ -218,12 +1366,9 @@ class GestorBD:
             return False, f"Erro no banco de dados: {e}"
         except ValueError as ve:
             return False, str(ve)
-        finally:
-            self.fechar_conexao()
 
     def adicionar_aluno_professor(self, nome: str, ra: str, materia: str, senha_limpa: str) -> tuple[bool, str]:
         """Adiciona um novo aluno via painel do professor."""
-        self._conectar()
         ra_upper = ra.upper()
         
         try:
@@ -231,46 +1376,131 @@ class GestorBD:
                  return False, f"Erro: RA já cadastrado no sistema ({ra_upper})."
 
             senha_hash = self._hash_senha(senha_limpa)
-            cursor = self.conn.cursor()
-            
-            cursor.execute(
-                "INSERT INTO Alunos (ra, nome, email, senha_hash, curso, primeiro_acesso) VALUES (?, ?, NULL, ?, ?, 1)",
-                (ra_upper, nome, senha_hash, "ADS")
-            )
-            
-            for m in MATERIAS_ADS:
+
+            def inserir_aluno(cursor: sqlite3.Cursor):
                 cursor.execute(
-                    "INSERT INTO Notas (ra_aluno, materia, np1, np2, pim) VALUES (?, ?, ?, ?, ?)",
-                    (ra_upper, m, 0.0, 0.0, 0.0)
+                    SQL_INSERIR_ALUNO_PROVISORIO,
+                    (ra_upper, nome, senha_hash, "ADS")
                 )
+                self._matricular(cursor, [ra_upper])
 
-            self.conn.commit()
+            self._executar_escrita(inserir_aluno)
             return True, f"Aluno {nome} cadastrado. Senha inicial é: {senha_limpa}"
 
+        except sqlite3.IntegrityError:
+            return False, f"Erro: RA já cadastrado no sistema ({ra_upper})."
         except sqlite3.Error as e:
             return False, f"Erro no banco de dados: {e}"
         except ValueError as ve:
             return False, str(ve)
+
+    def _matricular(self, cursor: sqlite3.Cursor, ras: typing.Sequence[str]):
+        """Cria as linhas de Notas (zeradas) de cada RA em todas as MATERIAS_ADS e o seu PIM."""
+        cursor.executemany(SQL_MATRICULAR_NOTAS, [(ra, materia) for ra in ras for materia in MATERIAS_ADS])
+        cursor.executemany(SQL_MATRICULAR_PIM, [(ra,) for ra in ras])
+        chaves = [('turma', materia) for materia in MATERIAS_ADS]
+        for ra in ras:
+            chaves += _chaves_notas(ra, MATERIAS_ADS)
+        self._invalidar_cache(chaves)
+
+    def buscar_ras_existentes(self, ras: typing.Sequence[str]) -> typing.Set[str]:
+        """Retorna, dentre os RAs informados, aqueles que já estão cadastrados."""
+        ras_upper = [ra.upper() for ra in ras]
+        if not ras_upper:
+            return set()
+        self._conectar()
+        try:
+            cursor = self.conn.cursor()
+            existentes = set()
+            # Respeita o limite de parâmetros do SQLite consultando em blocos
+            for i in range(0, len(ras_upper), TAMANHO_BLOCO_IN):
+                bloco = ras_upper[i:i + TAMANHO_BLOCO_IN]
+                cursor.execute(SQL_RAS_EXISTENTES.format(marcadores=", ".join("?" * len(bloco))), bloco)
+                existentes.update(row['ra'] for row in cursor.fetchall())
+            return existentes
         finally:
-            self.fechar_conexao()
+            self._liberar_conexao()
+
+    def gerar_hashes_senha(self, senha_limpa: str, quantidade: int) -> typing.List[str]:
+        """
+        Gera `quantidade` hashes da mesma senha, cada um com seu próprio sal,
+        em paralelo. Para chamar antes de abrir uma transação: o bcrypt não
+        deve rodar segurando o lock de escrita.
+        """
+        return self._hash_senhas_lote([senha_limpa] * quantidade)
+
+    def adicionar_alunos_lote(self, alunos: typing.Sequence[tuple[str, str]], senha_limpa: str,
+                              hashes: typing.Optional[typing.Sequence[str]] = None) -> tuple[bool, str]:
+        """
+        Cadastra vários alunos (ra, nome) de uma vez, com senha provisória e
+        primeiro acesso pendente, matriculando-os em todas as MATERIAS_ADS.
+        Os registros devem chegar já validados (RAs únicos e inéditos): a
+        gravação usa executemany dentro de uma única transação.
+
+        `hashes` (um por aluno, de gerar_hashes_senha) dispensa o bcrypt aqui;
+        use-o quando a chamada estiver dentro de uma transação maior.
+        """
+        try:
+            # Cada aluno recebe seu próprio sal; os hashes são gerados em paralelo antes da gravação
+            if hashes is None:
+                hashes = self.gerar_hashes_senha(senha_limpa, len(alunos))
+            registros = [(ra.upper(), nome, senha_hash, "ADS") for (ra, nome), senha_hash in zip(alunos, hashes)]
+
+            def inserir_alunos(cursor: sqlite3.Cursor):
+                cursor.executemany(
+                    SQL_INSERIR_ALUNO_PROVISORIO,
+                    registros
+                )
+                self._matricular(cursor, [ra for ra, _, _, _ in registros])
+
+            self._executar_escrita(inserir_alunos)
+            return True, f"{len(registros)} aluno(s) cadastrado(s)."
+        except sqlite3.Error as e:
+            return False, f"Erro no banco de dados: {e}"
+        except ValueError as ve:
+            return False, str(ve)
+
+    def redefinir_senhas_provisorias(self, ras: typing.Sequence[str], senha_limpa: str) -> tuple[bool, str]:
+        """
+        Redefine a senha de vários alunos para uma senha provisória, exigindo
+        novamente o fluxo de primeiro acesso. Os hashes são gerados em paralelo
+        e gravados com uma única escrita em lote.
+        """
+        try:
+            hashes = self._hash_senhas_lote([senha_limpa] * len(ras))
+
+            def redefinir(cursor: sqlite3.Cursor) -> int:
+                cursor.executemany(
+                    SQL_REDEFINIR_SENHA_PROVISORIA,
+                    [(senha_hash, ra.upper()) for ra, senha_hash in zip(ras, hashes)]
+                )
+                self._encerrar_sessoes('aluno', [ra.upper() for ra in ras])
+                return cursor.rowcount
+
+            alterados = self._executar_escrita(redefinir)
+            return True, f"Senha provisória definida para {alterados} aluno(s)."
+        except sqlite3.Error as e:
+            return False, f"Erro ao redefinir senhas: {e}"
+        except ValueError as ve:
+            return False, str(ve)
 
     def atualizar_aluno_primeiro_acesso(self, ra: str, novo_email: str, nova_senha_limpa: str) -> tuple[bool, str]:
         """Atualiza email, senha e marca o primeiro acesso como concluído."""
-        self._conectar()
         try:
             if not self._validar_email(novo_email):
                  return False, "Formato de e-mail inválido."
                 
             senha_hash = self._hash_senha(nova_senha_limpa)
-            cursor = self.conn.cursor()
-            
-            cursor.execute(
-                "UPDATE Alunos SET email = ?, senha_hash = ?, primeiro_acesso = 0 WHERE ra = ?",
-                (novo_email.lower(), senha_hash, ra.upper())
-            )
-            self.conn.commit()
+
+            def atualizar(cursor: sqlite3.Cursor) -> int:
+                cursor.execute(
+                    SQL_ATUALIZAR_PRIMEIRO_ACESSO,
+                    (novo_email.lower(), senha_hash, ra.upper())
+                )
+                self._encerrar_sessoes('aluno', [ra.upper()])
+                return cursor.rowcount
             
-            if cursor.rowcount == 0:
+            if self._executar_escrita(atualizar) == 0:
                  return False, "Aluno (RA) não encontrado para atualização."
                 
             return True, "Dados de acesso atualizados."
@@ -278,8 +1508,6 @@ class GestorBD:
             return False, f"Erro ao atualizar dados: {e}"
         except ValueError as ve:
             return False, str(ve)
-        finally:
-            self.fechar_conexao()
 
     # -----------------------------------------------
     # MÉTODOS DE NOTAS
@@ -290,45 +1518,223 @@ class GestorBD:
         Retorna uma lista de tuplas (nome, ra) de todos os alunos que estão matriculados
         na matéria.
         """
+        def carregar() -> tuple:
+            return tuple((row['nome'], row['ra']) for row in self._executar_busca_todos(SQL_ALUNOS_DA_MATERIA, (materia,)))
+
+        try:
+            return list(self._ler_com_cache(('turma', materia), carregar))
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar alunos da matéria: {e}")
+            return []
+
+    def buscar_boletim_turma(self, materia: str) -> typing.List[tuple[str, str, typing.Optional[float], typing.Optional[float], typing.Optional[float]]]:
+        """
+        Retorna o boletim completo da turma em uma única consulta: uma lista de
+        tuplas (ra, nome, np1, np2, pim), onde o PIM é a nota global do aluno
+        (tabela NotasPIM). Ordenado por nome.
+        """
+        def carregar() -> tuple:
+            return tuple((row['ra'], row['nome'], row['np1'], row['np2'], row['pim'])
+                         for row in self._executar_busca_todos(SQL_BOLETIM_TURMA, (materia,)))
+
+        try:
+            return list(self._ler_com_cache(('boletim_turma', materia), carregar))
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar boletim da turma: {e}")
+            return []
+
+    def buscar_pagina_turma(self, materia: str, limite: int = TAMANHO_PAGINA,
+                            apos: typing.Optional[tuple] = None, antes: typing.Optional[tuple] = None,
+                            busca: str = "", status: typing.Optional[str] = None) -> typing.List[tuple[str, str, typing.Optional[float], typing.Optional[float], typing.Optional[float]]]:
+        """
+        Uma página do boletim da turma, no formato de buscar_boletim_turma.
+
+        `busca` filtra pelo início do nome (sem distinção de maiúsculas) ou,
+        se tiver dígitos, pelo início do RA; `status` ('Aprovado', 'Em Exame'
+        ou 'Reprovado') filtra pela MS. A ordem é a de chave_paginacao(), e
+        `apos`/`antes` são essa chave da última/primeira linha já exibida (sem
+        nenhuma das duas, devolve a primeira página). O custo depende do
+        tamanho da página, não da posição na turma.
+        """
+        sql, params = _sql_pagina_turma(materia, limite, apos, antes, busca, status)
+        try:
+            linhas = [(row['ra'], row['nome'], row['np1'], row['np2'], row['pim'])
+                      for row in self._executar_busca_todos(sql, params)]
+            # A página anterior é lida de trás para frente
+            return linhas[::-1] if antes is not None and apos is None else linhas
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar página da turma: {e}")
+            return []
+
+    def contar_alunos_da_materia(self, materia: str) -> int:
+        """Quantidade de alunos matriculados na matéria."""
+        try:
+            return self._executar_busca(SQL_CONTAR_TURMA, (materia,))['total']
+        except sqlite3.Error as e:
+            print(f"Erro ao contar alunos da matéria: {e}")
+            return 0
+
+    def buscar_boletim_alunos_da_turma(self, materia: str, ras: typing.Iterable[str]) -> typing.List[tuple[str, str, typing.Optional[float], typing.Optional[float], typing.Optional[float]]]:
+        """
+        Como buscar_boletim_turma, mas apenas para os RAs informados (usado para
+        atualizar só as linhas alteradas). RAs sem matrícula ficam de fora.
+        """
+        ras_upper = [ra.upper() for ra in ras]
+        linhas = []
+        try:
+            # Respeita o limite de parâmetros do SQLite consultando em blocos
+            for i in range(0, len(ras_upper), TAMANHO_BLOCO_IN):
+                bloco = ras_upper[i:i + TAMANHO_BLOCO_IN]
+                sql = SQL_BOLETIM_ALUNOS_DA_TURMA.format(marcadores=", ".join("?" * len(bloco)))
+                linhas += [(row['ra'], row['nome'], row['np1'], row['np2'], row['pim'])
+                           for row in self._executar_busca_todos(sql, (materia, *bloco))]
+            return linhas
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar boletim dos alunos: {e}")
+            return []
+
+    def buscar_alunos_por_status(self, materia: str, status: str) -> typing.List[tuple[str, str, float, float, float, float]]:
+        """
+        Retorna (ra, nome, np1, np2, pim, ms) dos alunos da matéria com o status
+        informado ('Aprovado', 'Em Exame' ou 'Reprovado'), ordenados por nome.
+        A consulta usa o índice (materia, media_parcial) da coluna gerada; a MS
+        é arredondada aqui, como em CalculadoraAcademica.calcular_ms.
+        """
+        if status not in FAIXAS_STATUS:
+            raise ValueError(f"Status desconhecido: {status}.")
+        calc = CalculadoraAcademica
+        minimo, maximo = FAIXAS_STATUS[status]
+        # Limites abertos viram os extremos possíveis da MS
+        minimo = calc.NOTA_MINIMA if minimo is None else minimo
+        maximo = calc.NOTA_MAXIMA + 1 if maximo is None else maximo
+        # Como o PIM soma entre 0 e PESO_PIM * NOTA_MAXIMA à parcial, quem está
+        # na faixa tem a parcial em [minimo - contribuição máxima do PIM, maximo)
+        # (com folga para os erros de ponto flutuante da soma).
+        folga = 0.01
         self._conectar()
         try:
             cursor = self.conn.cursor()
-            cursor.execute("""
-                SELECT A.nome, A.ra 
-                FROM Alunos A
-                INNER JOIN Notas N ON A.ra = N.ra_aluno 
-                WHERE N.materia = ?
-                ORDER BY A.nome
-            """, (materia,))
-            return [(row['nome'], row['ra']) for row in cursor.fetchall()] 
+            cursor.execute(SQL_ALUNOS_POR_STATUS, (
+                materia,
+                minimo - calc.PESO_PIM * calc.NOTA_MAXIMA - folga,
+                maximo + folga,
+                minimo,
+                maximo,
+            ))
+            return [(*row[:5], round(row[5], 2)) for row in cursor.fetchall()]
         except sqlite3.Error as e:
-            print(f"Erro ao buscar alunos da matéria: {e}")
+            print(f"Erro ao buscar alunos por status: {e}")
             return []
         finally:
-            self.fechar_conexao()
+            self._liberar_conexao()
 
-    def buscar_notas_aluno(self, ra: str, materia: str) -> typing.Optional[tuple[typing.Optional[float], typing.Optional[float], typing.Optional[float]]]:
-        """Retorna as notas (np1, np2, pim) de um aluno para uma matéria."""
+    def contar_status_por_materia(self) -> typing.Dict[str, typing.Dict[str, int]]:
+        """Retorna {materia: {status: quantidade}} calculado inteiramente no banco."""
         self._conectar()
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT np1, np2, pim FROM Notas WHERE ra_aluno = ? AND materia = ?",
-                (ra.upper(), materia)
-            )
-            notas = cursor.fetchone()
+            cursor.execute(SQL_CONTAGEM_STATUS)
+            contagem: typing.Dict[str, typing.Dict[str, int]] = {}
+            for row in cursor.fetchall():
+                contagem.setdefault(row['materia'], {})[row['status']] = row['total']
+            return contagem
+        except sqlite3.Error as e:
+            print(f"Erro ao contar status: {e}")
+            return {}
+        finally:
+            self._liberar_conexao()
+
+    def buscar_boletim_aluno(self, ra: str) -> typing.List[tuple[str, typing.Optional[float], typing.Optional[float], typing.Optional[float]]]:
+        """
+        Retorna o boletim do aluno em uma única consulta: uma lista de tuplas
+        (materia, np1, np2, pim) na ordem de MATERIAS_ADS, com o PIM global.
+        """
+        def carregar() -> tuple:
+            linhas = {row['materia']: (row['materia'], row['np1'], row['np2'], row['pim'])
+                      for row in self._executar_busca_todos(SQL_BOLETIM_ALUNO, (ra.upper(),))}
+            return tuple(linhas[m] for m in MATERIAS_ADS if m in linhas)
+
+        try:
+            return list(self._ler_com_cache(('boletim_aluno', ra.upper()), carregar))
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar boletim do aluno: {e}")
+            return []
+
+    # -----------------------------------------------
+    # REGISTRO DE ALTERAÇÕES
+    # -----------------------------------------------
+
+    def versao_alteracoes(self) -> int:
+        """Versão atual do registro de alterações das notas (0 se nada foi alterado)."""
+        try:
+            linha = self._executar_busca(SQL_VERSAO_ALTERACOES, ())
+            return linha['seq'] if linha else 0
+        except sqlite3.Error as e:
+            print(f"Erro ao ler versão das alterações: {e}")
+            return 0
+
+    def _alteracoes_desde(self, versao: int, sql: str, params: typing.Callable[[int], tuple]) -> tuple[int, typing.Optional[typing.Set]]:
+        """
+        Executa a consulta de alterações no intervalo (versao, atual]. Devolve
+        (atual, valores) ou (atual, None) se o registro já não cobre `versao`.
+        """
+        atual = self.versao_alteracoes()
+        if atual <= versao:
+            return atual, set()
+        self._conectar()
+        try:
+            cursor = self.conn.cursor()
+            # Alterações anteriores à mais antiga mantida foram descartadas
+            cursor.execute(SQL_MINIMA_ALTERACOES)
+            minima = cursor.fetchone()['minima']
+            if minima is None or minima > versao + 1:
+                return atual, None
+            cursor.execute(sql, params(atual))
+            return atual, {row[0] for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar alterações: {e}")
+            return versao, set()
+        finally:
+            self._liberar_conexao()
+
+    def buscar_alteracoes_turma(self, materia: str, versao: int) -> tuple[int, typing.Optional[typing.Set[str]]]:
+        """
+        RAs cujas notas na matéria (ou o PIM) mudaram depois de `versao`.
+        Retorna (nova_versao, ras); ras é None quando a versão é antiga demais
+        e a turma precisa ser recarregada por inteiro.
+        """
+        atual, ras = self._alteracoes_desde(versao, SQL_ALTERACOES_TURMA, lambda atual: (versao, atual, materia))
+        # A alteração pode ter vindo de outro processo: descarta o que estiver em cache desses alunos
+        for ra in ras or ():
+            self._invalidar_cache(_chaves_notas(ra, MATERIAS_ADS))
+        return atual, ras
+
+    def buscar_alteracoes_aluno(self, ra: str, versao: int) -> tuple[int, typing.Optional[typing.Set[typing.Optional[str]]]]:
+        """
+        Matérias do aluno alteradas depois de `versao` (None no conjunto = PIM,
+        ou seja, todas). Mesmo formato de retorno de buscar_alteracoes_turma.
+        """
+        atual, materias = self._alteracoes_desde(versao, SQL_ALTERACOES_ALUNO, lambda atual: (ra.upper(), versao, atual))
+        if materias:
+            self._invalidar_cache(_chaves_notas(ra.upper(), MATERIAS_ADS))
+        return atual, materias
+
+    def buscar_notas_aluno(self, ra: str, materia: str) -> typing.Optional[tuple[typing.Optional[float], typing.Optional[float], typing.Optional[float]]]:
+        """Retorna as notas (np1, np2) de um aluno para uma matéria, com o seu PIM global."""
+        def carregar() -> typing.Optional[tuple]:
+            notas = self._executar_busca(SQL_NOTAS_ALUNO, (ra.upper(), materia))
             if notas:
                 return (notas['np1'], notas['np2'], notas['pim'])
             return None
+
+        try:
+            return self._ler_com_cache(('notas', ra.upper(), materia), carregar)
         except sqlite3.Error as e:
             print(f"Erro ao buscar notas: {e}")
             return None
-        finally:
-            self.fechar_conexao()
             
     def lancar_nota(self, ra_aluno: str, materia: str, tipo_nota: str, nota: float) -> tuple[bool, str]:
         """Lança ou atualiza uma nota específica (NP1, NP2 ou PIM)."""
-        self._conectar()
         ra_aluno = ra_aluno.upper()
         tipo_nota_lower = tipo_nota.lower()
         
@@ -338,19 +1744,133 @@ class GestorBD:
         if not 0.0 <= nota <= 10.0:
             return False, "A nota deve estar entre 0.0 e 10.0."
             
-        try:
-            cursor = self.conn.cursor()
-            
-            cursor.execute("SELECT 1 FROM Notas WHERE ra_aluno = ? AND materia = ?", (ra_aluno, materia))
+        def atualizar(cursor: sqlite3.Cursor) -> tuple[bool, str]:
+            cursor.execute(SQL_MATRICULA_EXISTE, (ra_aluno, materia))
             if cursor.fetchone() is None:
                 return False, f"Aluno RA {ra_aluno} não matriculado na matéria {materia}."
                 
-            sql = f"UPDATE Notas SET {tipo_nota_lower} = ? WHERE ra_aluno = ? AND materia = ?"
-            cursor.execute(sql, (nota, ra_aluno, materia))
-            self.conn.commit()
-            
+            if tipo_nota_lower == 'pim':
+                cursor.execute(SQL_ATUALIZAR_PIM_ALUNO, (nota, ra_aluno))
+                self._invalidar_cache(_chaves_notas(ra_aluno, MATERIAS_ADS))
+            else:
+                sql = f"UPDATE Notas SET {tipo_nota_lower} = ? WHERE ra_aluno = ? AND materia = ?"
+                cursor.execute(sql, (nota, ra_aluno, materia))
+                self._invalidar_cache(_chaves_notas(ra_aluno, [materia]))
             return True, "Nota atualizada com sucesso!"
+
+        try:
+            return self._executar_escrita(atualizar)
         except sqlite3.Error as e:
             return False, f"Erro ao lançar nota: {e}"
-        finally:
-            self.fechar_conexao()
\ No newline at end of file
+
+    def lancar_notas(self, ra_aluno: str, materia: str, notas: typing.Dict[str, float]) -> tuple[bool, str]:
+        """
+        Lança várias notas (NP1, NP2 e/ou PIM) de um aluno em uma única transação.
+
+        `notas` mapeia o tipo da nota para o valor, ex.: {'NP1': 7.5, 'NP2': 8.0}.
+        Se 'PIM' estiver presente, grava o PIM global do aluno (uma linha em
+        NotasPIM, vale para todas as matérias). Ou todas as notas são gravadas,
+        ou nenhuma.
+        """
+        ra_aluno = ra_aluno.upper()
+        notas_lower = {tipo.lower(): nota for tipo, nota in notas.items()}
+
+        for tipo_nota, nota in notas_lower.items():
+            if tipo_nota not in ['np1', 'np2', 'pim']:
+                return False, "Tipo de nota inválido. Deve ser 'NP1', 'NP2' ou 'PIM'."
+            if not 0.0 <= nota <= 10.0:
+                return False, "A nota deve estar entre 0.0 e 10.0."
+
+        if not notas_lower:
+            return True, "Nenhuma nota para atualizar."
+
+        pim = notas_lower.pop('pim', None)
+
+        def atualizar(cursor: sqlite3.Cursor) -> tuple[bool, str]:
+            cursor.execute(SQL_MATRICULA_EXISTE, (ra_aluno, materia))
+            if cursor.fetchone() is None:
+                return False, f"Aluno RA {ra_aluno} não matriculado na matéria {materia}."
+
+            if notas_lower:
+                colunas = ", ".join(f"{tipo_nota} = ?" for tipo_nota in notas_lower)
+                cursor.execute(
+                    SQL_ATUALIZAR_COLUNAS_NOTAS.format(colunas=colunas),
+                    (*notas_lower.values(), ra_aluno, materia)
+                )
+
+            if pim is not None:
+                cursor.execute(SQL_ATUALIZAR_PIM_ALUNO, (pim, ra_aluno))
+
+            # O PIM global muda a linha do aluno em todas as matérias
+            self._invalidar_cache(_chaves_notas(ra_aluno, MATERIAS_ADS if pim is not None else [materia]))
+            return True, "Notas atualizadas com sucesso!"
+
+        try:
+            return self._executar_escrita(atualizar)
+        except sqlite3.Error as e:
+            return False, f"Erro ao lançar notas: {e}"
+
+    def lancar_notas_lote(self, registros: typing.Sequence[tuple[str, str, typing.Optional[float], typing.Optional[float], typing.Optional[float]]]) -> tuple[bool, str]:
+        """
+        Lança notas de vários alunos de uma vez. Cada registro é
+        (ra, materia, np1, np2, pim); notas None mantêm o valor atual e o PIM,
+        quando informado, é o PIM global do aluno.
+        Os registros devem chegar já validados; tudo é gravado com executemany
+        em uma única transação.
+        """
+        notas = [(np1, np2, ra.upper(), materia) for ra, materia, np1, np2, _ in registros if np1 is not None or np2 is not None]
+        pims = [(pim, ra.upper()) for ra, _, _, _, pim in registros if pim is not None]
+
+        def atualizar(cursor: sqlite3.Cursor):
+            cursor.executemany(SQL_ATUALIZAR_NOTAS, notas)
+            cursor.executemany(SQL_ATUALIZAR_PIM_ALUNO, pims)
+            chaves = set()
+            for _, _, ra, materia in notas:
+                chaves.update(_chaves_notas(ra, [materia]))
+            for _, ra in pims:
+                chaves.update(_chaves_notas(ra, MATERIAS_ADS))
+            self._invalidar_cache(chaves)
+
+        try:
+            self._executar_escrita(atualizar)
+            return True, f"Notas de {len(registros)} registro(s) atualizadas."
+        except sqlite3.Error as e:
+            return False, f"Erro ao lançar notas: {e}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ferramentas de diagnóstico do banco de dados acadêmico.")
+    parser.add_argument("--db", default="sistema_academico.db", help="Arquivo do banco SQLite.")
+    parser.add_argument("--perfil", default=PERFIL_SQLITE_PADRAO, choices=list(PERFIS_SQLITE), help="Perfil de desempenho do SQLite.")
+    parser.add_argument("--planos", action="store_true", help="Mostra o EXPLAIN QUERY PLAN de cada consulta do GestorBD.")
+    parser.add_argument("--calibrar-bcrypt", type=float, metavar="ALVO_MS",
+                        help="Calibra o custo do bcrypt desta máquina para ALVO_MS por hash e o guarda no banco.")
+    parser.add_argument("--conferir-status", type=int, metavar="AMOSTRAS",
+                        help="Confere o status calculado pelo SQLite contra a CalculadoraAcademica em AMOSTRAS trios de notas.")
+    args = parser.parse_args()
+
+    if args.conferir_status:
+        gestor = GestorBD(args.db, perfil=args.perfil)
+        divergencias = gestor.conferir_status(args.conferir_status)
+        gestor.fechar_conexao()
+        for np1, np2, pim, status_sql, status_python in divergencias[:20]:
+            print(f"  {np1!r} / {np2!r} / {pim!r}: SQL {status_sql}, Python {status_python}")
+        print(f"{len(divergencias)} divergência(s) de status entre o SQLite e a CalculadoraAcademica.")
+        raise SystemExit(1 if divergencias else 0)
+    elif args.planos:
+        gestor = GestorBD(args.db, perfil=args.perfil)
+        gestor.inicializar_db()
+        print(gestor.relatorio_planos())
+        gestor.fechar_conexao()
+    elif args.calibrar_bcrypt:
+        gestor = GestorBD(args.db, perfil=args.perfil)
+        gestor.inicializar_db()
+        anterior = gestor.custo_calibrado()
+        custo = gestor.calibrar_bcrypt(args.calibrar_bcrypt)
+        print(f"Custo do bcrypt desta máquina em {args.db}: {anterior or 'não calibrado'} -> {custo}. "
+              "Os hashes de custo menor serão refeitos no próximo login de cada usuário.")
+        gestor.fechar_conexao()
+    else:
+        parser.print_help()
@@ -0,0 +1,194 @@
+import csv
+import typing
+from dataclasses import dataclass, field
+
+from modelos import MATERIAS_ADS, PIM_MATERIA
+from gestor_db import GestorBD
+
+# Senha provisória usada no cadastro em lote (mesma do cadastro rápido do professor)
+SENHA_INICIAL_PADRAO = "123456"
+
+COLUNAS_ALUNOS = {'ra', 'nome'}
+COLUNAS_NOTAS = {'ra', 'materia'}
+
+
+@dataclass
+class RelatorioImportacao:
+    """Resultado de uma importação: quantos registros entraram e os erros por linha."""
+    tipo: str = ""
+    importados: int = 0
+    erros: typing.List[tuple[int, str]] = field(default_factory=list)
+
+    def resumo(self, max_erros: int = 10) -> str:
+        """Texto curto para exibir ao usuário (lista apenas os primeiros erros)."""
+        linhas = [f"{self.importados} registro(s) de {self.tipo} importado(s), {len(self.erros)} linha(s) com erro."]
+        for num_linha, msg in self.erros[:max_erros]:
+            linhas.append(f"Linha {num_linha}: {msg}")
+        if len(self.erros) > max_erros:
+            linhas.append(f"... e mais {len(self.erros) - max_erros} erro(s).")
+        return "\n".join(linhas)
+
+
+class _ImportacaoCancelada(Exception):
+    """Erro de banco durante a gravação: desfaz a importação inteira."""
+
+
+class ImportadorCSV:
+    """
+    Importa, a partir de um CSV, a lista de alunos de uma turma ou as notas lançadas.
+
+    O formato é detectado pelo cabeçalho:
+      - Alunos: colunas `ra` e `nome`.
+      - Notas:  colunas `ra`, `materia` e qualquer uma de `np1`, `np2`, `pim`
+                (células vazias mantêm a nota atual). Como no formulário de
+                notas, só valem linhas da `materia` do professor, e o PIM só
+                é aceito se essa matéria for a PIM_MATERIA.
+
+    O arquivo é lido em blocos de `tamanho_lote` linhas; cada bloco é validado
+    em Python (linhas inválidas entram no relatório sem interromper o lote) e
+    gravado com executemany. Toda a validação e o bcrypt das senhas acontecem
+    antes da gravação, que é feita em uma única transação curta, só com os INSERTs.
+    """
+
+    def __init__(self, gestor_bd: GestorBD, materia: str, tamanho_lote: int = 1000):
+        self.gestor = gestor_bd
+        self.materia = materia.upper()
+        self.tamanho_lote = tamanho_lote
+
+    def importar(self, caminho: str, senha_inicial: str = SENHA_INICIAL_PADRAO) -> RelatorioImportacao:
+        """Importa o arquivo CSV indicado e devolve o relatório da importação."""
+        relatorio = RelatorioImportacao()
+        self._ras_importados: typing.Set[str] = set()
+        with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+            # Planilhas em português costumam exportar com ';' (a vírgula é o separador decimal)
+            cabecalho = arquivo.readline()
+            arquivo.seek(0)
+            leitor = csv.DictReader(arquivo, delimiter=';' if ';' in cabecalho else ',')
+            colunas = {(c or "").strip().lower() for c in (leitor.fieldnames or [])}
+
+            if COLUNAS_NOTAS <= colunas:
+                relatorio.tipo = "notas"
+                preparar_bloco = self._preparar_bloco_notas
+            elif COLUNAS_ALUNOS <= colunas:
+                relatorio.tipo = "alunos"
+                preparar_bloco = lambda bloco, rel: self._preparar_bloco_alunos(bloco, rel, senha_inicial)
+            else:
+                relatorio.erros.append((1, "Cabeçalho não reconhecido. Use 'ra,nome' (alunos) ou 'ra,materia,np1,np2,pim' (notas)."))
+                return relatorio
+
+            try:
+                # Primeiro valida (e gera os hashes) sem transação aberta: com o lock
+                # de escrita reservado, os outros escritores esperariam pelo bcrypt
+                gravacoes: typing.List[typing.Callable[[], int]] = []
+                bloco = []
+                # A linha 1 é o cabeçalho
+                for num_linha, linha in enumerate(leitor, start=2):
+                    bloco.append((num_linha, self._normalizar_linha(linha)))
+                    if len(bloco) >= self.tamanho_lote:
+                        gravacoes += preparar_bloco(bloco, relatorio)
+                        bloco = []
+                if bloco:
+                    gravacoes += preparar_bloco(bloco, relatorio)
+
+                with self.gestor.transacao():
+                    for gravar in gravacoes:
+                        relatorio.importados += gravar()
+            except _ImportacaoCancelada as e:
+                relatorio.importados = 0
+                relatorio.erros.append((0, f"Importação cancelada, nada foi gravado: {e}"))
+
+        return relatorio
+
+    # -----------------------------------------------
+    # BLOCOS
+    # -----------------------------------------------
+
+    # Cada bloco validado vira uma gravação (devolve quantos registros gravou),
+    # executada depois, dentro da transação da importação.
+
+    def _preparar_bloco_alunos(self, bloco, relatorio: RelatorioImportacao, senha_inicial: str) -> list:
+        existentes = self.gestor.buscar_ras_existentes([linha['ra'] for _, linha in bloco])
+        validos = []
+        vistos = set()
+        for num_linha, linha in bloco:
+            ra = linha.get('ra', '').upper()
+            nome = linha.get('nome', '')
+            if len(ra) < 7:
+                relatorio.erros.append((num_linha, f"RA inválido ({ra or 'vazio'})."))
+            elif not nome:
+                relatorio.erros.append((num_linha, "Nome vazio."))
+            elif ra in vistos or ra in self._ras_importados:
+                relatorio.erros.append((num_linha, f"RA repetido no arquivo ({ra})."))
+            elif ra in existentes:
+                relatorio.erros.append((num_linha, f"RA já cadastrado no sistema ({ra})."))
+            else:
+                vistos.add(ra)
+                validos.append((ra, nome))
+
+        if not validos:
+            return []
+        self._ras_importados.update(vistos)
+        try:
+            hashes = self.gestor.gerar_hashes_senha(senha_inicial, len(validos))
+        except ValueError as ve:
+            raise _ImportacaoCancelada(str(ve))
+
+        def gravar() -> int:
+            sucesso, msg = self.gestor.adicionar_alunos_lote(validos, senha_inicial, hashes)
+            if not sucesso:
+                raise _ImportacaoCancelada(msg)
+            return len(validos)
+        return [gravar]
+
+    def _preparar_bloco_notas(self, bloco, relatorio: RelatorioImportacao) -> list:
+        existentes = self.gestor.buscar_ras_existentes([linha['ra'] for _, linha in bloco])
+        validos = []
+        for num_linha, linha in bloco:
+            ra = linha.get('ra', '').upper()
+            materia = linha.get('materia', '').upper()
+            if ra not in existentes:
+                relatorio.erros.append((num_linha, f"RA não cadastrado ({ra or 'vazio'})."))
+                continue
+            if materia not in MATERIAS_ADS:
+                relatorio.erros.append((num_linha, f"Matéria desconhecida ({materia or 'vazia'})."))
+                continue
+            if materia != self.materia:
+                relatorio.erros.append((num_linha, f"Só é possível importar notas da sua matéria ({self.materia}), não de {materia}."))
+                continue
+            try:
+                notas = [self._ler_nota(linha.get(coluna, '')) for coluna in ('np1', 'np2', 'pim')]
+            except ValueError as ve:
+                relatorio.erros.append((num_linha, str(ve)))
+                continue
+            if notas[2] is not None and materia != PIM_MATERIA:
+                relatorio.erros.append((num_linha, "O PIM só pode ser lançado pelo professor da matéria PIM."))
+                continue
+            validos.append((ra, materia, *notas))
+
+        if not validos:
+            return []
+
+        def gravar() -> int:
+            sucesso, msg = self.gestor.lancar_notas_lote(validos)
+            if not sucesso:
+                raise _ImportacaoCancelada(msg)
+            return len(validos)
+        return [gravar]
+
+    @staticmethod
+    def _normalizar_linha(linha: dict) -> typing.Dict[str, str]:
+        """Padroniza nomes de coluna e remove espaços; colunas excedentes são ignoradas."""
+        return {(k or "").strip().lower(): v.strip() if isinstance(v, str) else "" for k, v in linha.items()}
+
+    @staticmethod
+    def _ler_nota(texto: str) -> typing.Optional[float]:
+        """Converte a célula em nota (aceita vírgula decimal); vazio significa 'não alterar'."""
+        if not texto:
+            return None
+        try:
+            nota = float(texto.replace(',', '.'))
+        except ValueError:
+            raise ValueError(f"Nota inválida ({texto}).")
+        if not 0.0 <= nota <= 10.0:
+            raise ValueError(f"A nota {nota:.2f} deve estar entre 0.0 e 10.0.")
+        return nota
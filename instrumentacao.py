@@ -0,0 +1,285 @@
+import contextlib
+import json
+import re
+import threading
+import time
+import typing
+from collections import deque
+from dataclasses import dataclass, field
+
+# Limites superiores (ms) das faixas dos histogramas de latência; a última faixa é "acima de"
+FAIXAS_LATENCIA_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+# Valores literais do SQL expandido pelo trace callback (texto, números, X'..')
+_LITERAIS_SQL = re.compile(r"'(?:[^']|'')*'|X'[0-9A-Fa-f]*'|\b\d+(?:\.\d+)?\b")
+_ESPACOS = re.compile(r"\s+")
+
+
+def _modelo_sql(sql: str) -> tuple[str, int]:
+    """
+    SQL sem os valores: o trace callback recebe o comando com os parâmetros já
+    substituídos (inclusive hashes de senha), que não devem ir para o log.
+    Devolve (texto com '?' no lugar dos literais, quantidade de literais).
+    """
+    modelo, quantidade = _LITERAIS_SQL.subn("?", sql)
+    return _ESPACOS.sub(" ", modelo).strip(), quantidade
+
+
+@dataclass
+class EstatisticaMetodo:
+    """Chamadas, tempo total/máximo e histograma de latência de um método."""
+    chamadas: int = 0
+    total_s: float = 0.0
+    maximo_s: float = 0.0
+    histograma: typing.List[int] = field(default_factory=lambda: [0] * (len(FAIXAS_LATENCIA_MS) + 1))
+
+    def registrar(self, duracao_s: float):
+        self.chamadas += 1
+        self.total_s += duracao_s
+        self.maximo_s = max(self.maximo_s, duracao_s)
+        duracao_ms = duracao_s * 1000
+        for posicao, limite in enumerate(FAIXAS_LATENCIA_MS):
+            if duracao_ms <= limite:
+                self.histograma[posicao] += 1
+                return
+        self.histograma[-1] += 1
+
+    def como_dict(self) -> dict:
+        faixas = [f"<={limite}ms" for limite in FAIXAS_LATENCIA_MS] + [f">{FAIXAS_LATENCIA_MS[-1]}ms"]
+        return {
+            'chamadas': self.chamadas,
+            'total_ms': self.total_s * 1000,
+            'media_ms': self.total_s * 1000 / self.chamadas if self.chamadas else 0.0,
+            'maximo_ms': self.maximo_s * 1000,
+            'histograma': {faixa: n for faixa, n in zip(faixas, self.histograma) if n},
+        }
+
+
+class InstrumentacaoBD:
+    """
+    Medições do GestorBD, ligadas com GestorBD(instrumentar=True): chamadas e
+    latência de cada método público (e do bcrypt), aberturas de conexão e o
+    log das consultas lentas.
+
+    As consultas são observadas pelo trace callback do sqlite3, chamado no
+    início de cada comando. Um comando é considerado concluído quando começa
+    o próximo na mesma thread, ou quando o método medido que o executou
+    retorna (ou chama outro método medido, como o bcrypt); acima de
+    `limite_lento_ms` ele entra em `consultas_lentas` com o SQL sem os
+    valores, a quantidade de parâmetros, a duração e o método.
+    """
+
+    def __init__(self, limite_lento_ms: float = 50.0, max_consultas_lentas: int = 200):
+        self.limite_lento_s = limite_lento_ms / 1000
+        self.metodos: typing.Dict[str, EstatisticaMetodo] = {}
+        self.consultas_lentas: typing.Deque[dict] = deque(maxlen=max_consultas_lentas)
+        self.conexoes = EstatisticaMetodo()
+        self._lock = threading.Lock()
+        # Por thread: pilha de métodos medidos e o comando SQL em andamento
+        self._local = threading.local()
+        # Com um RastreadorUI ativo, cada chamada medida também vira um trecho 'bd' do trace
+        self.rastreador: typing.Optional["RastreadorUI"] = None
+
+    def _pilha(self) -> list:
+        pilha = getattr(self._local, 'pilha', None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    # -----------------------------------------------
+    # COLETA
+    # -----------------------------------------------
+
+    def medir(self, nome: str, funcao: typing.Callable) -> typing.Callable:
+        """Envolve `funcao` (um método já ligado à instância) medindo cada chamada como `nome`."""
+        with self._lock:
+            estatistica = self.metodos.setdefault(nome, EstatisticaMetodo())
+
+        def medido(*args, **kwargs):
+            pilha = self._pilha()
+            inicio = time.perf_counter()
+            self.concluir_sql(inicio)
+            pilha.append(nome)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                fim = time.perf_counter()
+                self.concluir_sql(fim)
+                pilha.pop()
+                with self._lock:
+                    estatistica.registrar(fim - inicio)
+                if self.rastreador is not None:
+                    self.rastreador.registrar(nome, 'bd', inicio, fim)
+
+        medido.__name__ = getattr(funcao, '__name__', nome)
+        medido.__doc__ = getattr(funcao, '__doc__', None)
+        return medido
+
+    def registrar_sql(self, sql: str):
+        """Trace callback das conexões: marca o início de um comando."""
+        # Comandos de triggers vêm como comentários e fazem parte do comando que os disparou
+        if sql.startswith('--'):
+            return
+        agora = time.perf_counter()
+        self.concluir_sql(agora)
+        pilha = self._pilha()
+        self._local.sql = (sql, agora, pilha[-1] if pilha else None)
+
+    def concluir_sql(self, agora: float):
+        """Encerra o comando em andamento na thread e registra-o se foi lento."""
+        atual = getattr(self._local, 'sql', None)
+        if atual is None:
+            return
+        self._local.sql = None
+        sql, inicio, metodo = atual
+        duracao = agora - inicio
+        if duracao >= self.limite_lento_s:
+            modelo, parametros = _modelo_sql(sql)
+            with self._lock:
+                self.consultas_lentas.append({
+                    'sql': modelo[:500],
+                    'parametros': parametros,
+                    'duracao_ms': round(duracao * 1000, 3),
+                    'metodo': metodo,
+                    'quando': time.time(),
+                })
+
+    def registrar_conexao(self, duracao_s: float):
+        """Uma conexão aberta (connect + PRAGMAs do perfil) e quanto tempo levou."""
+        with self._lock:
+            self.conexoes.registrar(duracao_s)
+
+    # -----------------------------------------------
+    # RESULTADOS
+    # -----------------------------------------------
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                'metodos': {nome: e.como_dict() for nome, e in self.metodos.items() if e.chamadas},
+                'conexoes_abertas': self.conexoes.como_dict(),
+                'limite_lento_ms': self.limite_lento_s * 1000,
+                'consultas_lentas': list(self.consultas_lentas),
+            }
+
+    def relatorio(self, max_consultas: int = 10) -> str:
+        """Texto com os métodos (do maior tempo total ao menor), as conexões e as consultas mais lentas."""
+        dados = self.estatisticas()
+        linhas = [f"{'método':<36} {'chamadas':>8} {'total':>10} {'média':>9} {'máx':>9}"]
+        for nome, e in sorted(dados['metodos'].items(), key=lambda item: item[1]['total_ms'], reverse=True):
+            linhas.append(f"{nome:<36} {e['chamadas']:>8} {e['total_ms']:>8.1f}ms {e['media_ms']:>7.2f}ms {e['maximo_ms']:>7.1f}ms")
+        conexoes = dados['conexoes_abertas']
+        linhas.append(f"\nConexões abertas: {conexoes['chamadas']} ({conexoes['total_ms']:.1f} ms no total)")
+        lentas = sorted(dados['consultas_lentas'], key=lambda c: c['duracao_ms'], reverse=True)[:max_consultas]
+        linhas.append(f"Consultas acima de {dados['limite_lento_ms']:.0f} ms: {len(dados['consultas_lentas'])}")
+        for consulta in lentas:
+            linhas.append(f"  {consulta['duracao_ms']:8.1f}ms  {consulta['metodo'] or '-'}  "
+                          f"({consulta['parametros']} parâmetro(s))  {consulta['sql'][:160]}")
+        return "\n".join(linhas)
+
+    def salvar_json(self, caminho: str):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.estatisticas(), arquivo, indent=2, ensure_ascii=False)
+
+
+class RastreadorUI:
+    """
+    Rastreamento opcional da interface no formato Chrome trace (abra o JSON
+    em chrome://tracing ou em ui.perfetto.dev).
+
+    - trecho(nome, categoria): bloco medido, na thread atual. As categorias
+      usadas pelo main.py são 'widgets' (construção e preenchimento de telas),
+      'calculo' (CalculadoraAcademica) e 'bd' (métodos do GestorBD, vindos da
+      InstrumentacaoBD, inclusive os que rodam no worker).
+    - iniciar_interacao/concluir_interacao: do evento (clique, navegação,
+      sincronização) até a tela ser desenhada, em uma trilha própria.
+
+    Desligado (arquivo=None), trecho() devolve um contexto vazio e os demais
+    métodos não fazem nada.
+    """
+
+    def __init__(self, arquivo: typing.Optional[str] = None):
+        self.arquivo = arquivo
+        self.ativo = arquivo is not None
+        self._eventos: typing.List[dict] = []
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._proxima_interacao = 0
+        self._threads: typing.Dict[int, str] = {}
+
+    def _agora_us(self, instante: typing.Optional[float] = None) -> float:
+        return ((time.perf_counter() if instante is None else instante) - self._inicio) * 1e6
+
+    def _adicionar(self, evento: dict):
+        thread = threading.current_thread()
+        evento.setdefault('pid', 1)
+        evento.setdefault('tid', thread.ident)
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            self._eventos.append(evento)
+
+    def registrar(self, nome: str, categoria: str, inicio: float, fim: float, **args):
+        """Registra um trecho já medido (instantes de time.perf_counter)."""
+        if self.ativo:
+            self._adicionar({'name': nome, 'cat': categoria, 'ph': 'X', 'ts': self._agora_us(inicio),
+                             'dur': (fim - inicio) * 1e6, 'args': args})
+
+    @contextlib.contextmanager
+    def _trecho(self, nome: str, categoria: str, args: dict):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, categoria, inicio, time.perf_counter(), **args)
+
+    def trecho(self, nome: str, categoria: str, **args) -> typing.ContextManager:
+        if not self.ativo:
+            return _CONTEXTO_VAZIO
+        return self._trecho(nome, categoria, args)
+
+    def envolver(self, funcao: typing.Callable, nome: str, categoria: str) -> typing.Callable:
+        """Versão de `funcao` que registra cada chamada como um trecho."""
+        if not self.ativo:
+            return funcao
+
+        def rastreada(*args, **kwargs):
+            with self._trecho(nome, categoria, {}):
+                return funcao(*args, **kwargs)
+        return rastreada
+
+    def iniciar_interacao(self, nome: str) -> typing.Optional[tuple[int, str]]:
+        """Marca o início de uma interação; devolve o identificador para concluir_interacao."""
+        if not self.ativo:
+            return None
+        with self._lock:
+            self._proxima_interacao += 1
+            identificador = self._proxima_interacao
+        self._adicionar({'name': nome, 'cat': 'interacao', 'ph': 'b', 'id': identificador, 'ts': self._agora_us()})
+        return identificador, nome
+
+    def concluir_interacao(self, interacao: typing.Optional[tuple[int, str]], widget) -> None:
+        """
+        Conclui a interação quando o Tk terminar de desenhar: o after_idle
+        agendado agora roda depois dos redesenhos e ajustes de geometria já
+        pendentes, que também são tarefas ociosas.
+        """
+        if interacao is None:
+            return
+        identificador, nome = interacao
+        fim = {'name': nome, 'cat': 'interacao', 'ph': 'e', 'id': identificador}
+        widget.after_idle(lambda: self._adicionar(dict(fim, ts=self._agora_us())))
+
+    def salvar(self) -> typing.Optional[str]:
+        """Grava o JSON do trace em `arquivo` e devolve o caminho (None se desligado)."""
+        if not self.ativo:
+            return None
+        with self._lock:
+            nomes = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': nome}}
+                     for tid, nome in self._threads.items()]
+            eventos = nomes + list(self._eventos)
+        with open(self.arquivo, 'w', encoding='utf-8') as arquivo:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, arquivo, ensure_ascii=False)
+        return self.arquivo
+
+
+_CONTEXTO_VAZIO = contextlib.nullcontext()
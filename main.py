@@ -1,13 +1,18 @@
 import tkinter as tk
-from tkinter import messagebox, END
+from tkinter import messagebox, filedialog, END
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import typing
+import os
+import bisect
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
 
 # IMPORTAÇÕES DOS NOSSOS MÓDULOS (Conexão entre arquivos)
 from modelos import Aluno, Professor, MATERIAS_ADS, PIM_MATERIA
 from servicos import CalculadoraAcademica
-from gestor_db import GestorBD
+from gestor_db import GestorBD, PERFIL_SQLITE_PADRAO, TAMANHO_PAGINA, chave_paginacao, corresponde_busca
+from instrumentacao import RastreadorUI
 
 # --- CONSTANTES DE INTERFACE ---
 TEMA_BOOTSTRAP = "flatly" 
@@ -35,12 +40,305 @@ FEEDBACKS_ESTUDO = {
     )
 }
 
+# -----------------------------------------------------
+# EXECUÇÃO EM SEGUNDO PLANO
+# -----------------------------------------------------
+
+class ExecutorTarefas:
+    """
+    Executa chamadas bloqueantes do GestorBD (bcrypt + SQLite) em uma thread
+    de trabalho e entrega o resultado de volta na thread do Tk via after(),
+    para que a janela não congele durante o login ou o cadastro.
+    """
+    INTERVALO_VERIFICACAO_MS = 25
+
+    def __init__(self, raiz: tk.Misc):
+        self.raiz = raiz
+        # Um único worker: as chamadas ao banco ficam serializadas em uma só conexão
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gestor-bd")
+
+    def executar(self, dono: tk.Misc, funcao: typing.Callable, *args: typing.Any,
+                 ao_concluir: typing.Callable[[typing.Any], None],
+                 ao_falhar: typing.Optional[typing.Callable[[BaseException], None]] = None) -> None:
+        """
+        Agenda funcao(*args) no worker. ao_concluir(resultado) ou ao_falhar(erro)
+        rodam na thread do Tk, e só se o widget `dono` ainda existir.
+        """
+        futuro = self._pool.submit(funcao, *args)
+        self.raiz.after(self.INTERVALO_VERIFICACAO_MS, self._verificar, futuro, dono, ao_concluir, ao_falhar)
+
+    def _verificar(self, futuro: Future, dono, ao_concluir, ao_falhar) -> None:
+        if not futuro.done():
+            self.raiz.after(self.INTERVALO_VERIFICACAO_MS, self._verificar, futuro, dono, ao_concluir, ao_falhar)
+            return
+        if futuro.cancelled() or not dono.winfo_exists():
+            return
+        erro = futuro.exception()
+        if erro is None:
+            ao_concluir(futuro.result())
+        elif ao_falhar is not None:
+            ao_falhar(erro)
+        else:
+            messagebox.showerror("Erro", f"Falha inesperada: {erro}")
+
+    def encerrar(self) -> None:
+        """
+        Descarta as chamadas ainda na fila e espera a que está rodando (ex.: uma
+        importação no meio da transação) terminar: só depois disso a conexão do
+        worker pode ser fechada por GestorBD.fechar_conexao().
+        """
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class EstadoOcupado:
+    """Mostra o estado 'processando' em uma tela: desabilita o botão e troca o cursor."""
+
+    def __init__(self, tela: ttk.Frame, botao: ttk.Button, texto_ocupado: str = "Aguarde..."):
+        self.tela = tela
+        self.botao = botao
+        self.texto_ocupado = texto_ocupado
+        self.texto_original = botao.cget('text')
+        self.ativo = False
+
+    def iniciar(self) -> None:
+        self.ativo = True
+        self.botao.config(state='disabled', text=self.texto_ocupado)
+        self.tela.winfo_toplevel().config(cursor='watch')
+
+    def finalizar(self) -> None:
+        self.ativo = False
+        self.tela.winfo_toplevel().config(cursor='')
+        if self.botao.winfo_exists():
+            self.botao.config(state='normal', text=self.texto_original)
+
+    def falhar(self, erro: BaseException) -> None:
+        self.finalizar()
+        messagebox.showerror("Erro", f"Falha inesperada: {erro}")
+
+def fechar_janelas(tela: tk.Misc) -> None:
+    """
+    Fecha as janelas (Toplevel) abertas por uma tela. Telas em cache não são
+    destruídas ao sair: sem isso, um formulário de notas aberto continuaria
+    utilizável pelo próximo usuário da máquina.
+    """
+    for filho in tela.winfo_children():
+        if isinstance(filho, tk.Toplevel):
+            filho.destroy()
+
+class SincronizadorAlteracoes:
+    """
+    Mantém uma tela em dia com o registro de alterações das notas do GestorBD.
+    A cada INTERVALO_MS (ou quando sincronizar() é chamado, ex.: após salvar
+    uma nota) roda ler(versao) no worker, que devolve (nova_versao, dados), e
+    entrega os dados para aplicar(dados) na thread do Tk. Assim a tela só
+    atualiza as linhas que mudaram, inclusive as lançadas por outro professor.
+    """
+    INTERVALO_MS = 3000
+
+    def __init__(self, tela: ttk.Frame, tarefas: ExecutorTarefas,
+                 ler: typing.Callable[[int], tuple[int, typing.Any]],
+                 aplicar: typing.Callable[[typing.Any], None]):
+        self.tela = tela
+        self.tarefas = tarefas
+        self.ler = ler
+        self.aplicar = aplicar
+        self.versao = 0
+        self._em_andamento = False
+        self._pendente = False
+        self._interacao = None
+        self.rastro: RastreadorUI = tela.winfo_toplevel().rastro
+        self._id_agendamento = tela.after(self.INTERVALO_MS, self._periodico)
+        tela.bind('<Destroy>', self._cancelar, add='+')
+
+    def sincronizar(self) -> None:
+        # Uma leitura por vez; pedidos durante a leitura geram mais uma ao final
+        if self._em_andamento:
+            self._pendente = True
+            return
+        self._em_andamento = True
+        self._interacao = self.rastro.iniciar_interacao(f"sincronizar {type(self.tela).__name__}")
+        self.tarefas.executar(self.tela, self.ler, self.versao,
+                              ao_concluir=self._concluir, ao_falhar=self._falhar)
+
+    def _concluir(self, resultado: tuple[int, typing.Any]) -> None:
+        self._em_andamento = False
+        self.versao, dados = resultado
+        with self.rastro.trecho("aplicar alterações", 'widgets'):
+            self.aplicar(dados)
+        self.rastro.concluir_interacao(self._interacao, self.tela)
+        if self._pendente:
+            self._pendente = False
+            self.sincronizar()
+
+    def _falhar(self, erro: BaseException) -> None:
+        self._em_andamento = False
+        print(f"Erro ao sincronizar alterações: {erro}")
+
+    def _periodico(self) -> None:
+        self.sincronizar()
+        self._id_agendamento = self.tela.after(self.INTERVALO_MS, self._periodico)
+
+    def pausar(self) -> None:
+        """Para a leitura periódica (tela oculta, mas guardada no cache de telas)."""
+        if self._id_agendamento is not None:
+            self.tela.after_cancel(self._id_agendamento)
+            self._id_agendamento = None
+
+    def retomar(self) -> None:
+        """Aplica de uma vez o que mudou enquanto a tela esteve oculta e volta a ler periodicamente."""
+        if self._id_agendamento is None:
+            self._periodico()
+
+    def _cancelar(self, event: tk.Event) -> None:
+        if event.widget is self.tela:
+            self.pausar()
+
+# -----------------------------------------------------
+# COMPONENTES
+# -----------------------------------------------------
+
+class TabelaPaginada(ttk.Frame):
+    """
+    Treeview para listas grandes. As linhas são carregadas em páginas, por
+    chave (keyset), conforme o usuário rola, e a árvore mantém no máximo
+    PAGINAS_NA_JANELA páginas, descartando as do lado oposto à rolagem. Abrir
+    uma turma com milhares de alunos custa uma única página.
+
+    carregar(apos, antes, limite) devolve [(iid, valores)] ordenado por
+    chave(iid, valores); `apos`/`antes` são a chave da última/primeira linha
+    exibida (ambos None = primeira página).
+    """
+    PAGINAS_NA_JANELA = 3
+    # Fração da rolagem, perto das bordas, que já dispara a página seguinte
+    MARGEM_PRE_CARREGAMENTO = 0.15
+
+    def __init__(self, master, colunas: tuple[str, ...], chave: typing.Callable[[str, tuple], tuple],
+                 carregar: typing.Callable[[typing.Optional[tuple], typing.Optional[tuple], int], list],
+                 tamanho_pagina: int = TAMANHO_PAGINA):
+        super().__init__(master)
+        self.chave = chave
+        self.carregar = carregar
+        self.tamanho_pagina = tamanho_pagina
+        self.ha_mais_antes = False
+        self.ha_mais_depois = False
+        self._carregando = False
+
+        self.tree = ttk.Treeview(self, columns=colunas, show='headings')
+        for c in colunas: self.tree.heading(c, text=c)
+        self.barra = ttk.Scrollbar(self, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._ao_rolar)
+        self.barra.pack(side='right', fill='y')
+        self.tree.pack(side='left', expand=True, fill='both')
+
+    def _chave(self, iid: str) -> tuple:
+        return self.chave(iid, self.tree.item(iid, 'values'))
+
+    def recarregar(self, itens: typing.Optional[list] = None) -> None:
+        """
+        Descarta as linhas e exibe a primeira página; `itens` é a primeira
+        página já lida (por exemplo, em segundo plano), senão ela é carregada aqui.
+        """
+        self.tree.delete(*self.tree.get_children())
+        if itens is None:
+            itens = self.carregar(None, None, self.tamanho_pagina)
+        for iid, valores in itens:
+            self.tree.insert('', END, iid=iid, values=valores)
+        self.ha_mais_antes = False
+        self.ha_mais_depois = len(itens) == self.tamanho_pagina
+        self.tree.yview_moveto(0)
+
+    def _ao_rolar(self, inicio: str, fim: str) -> None:
+        self.barra.set(inicio, fim)
+        if self._carregando:
+            return
+        if float(fim) >= 1 - self.MARGEM_PRE_CARREGAMENTO and self.ha_mais_depois:
+            self._carregando = True
+            self.after_idle(self._carregar_depois)
+        elif float(inicio) <= self.MARGEM_PRE_CARREGAMENTO and self.ha_mais_antes:
+            self._carregando = True
+            self.after_idle(self._carregar_antes)
+
+    def _carregar_depois(self) -> None:
+        filhos = self.tree.get_children()
+        if filhos:
+            with self.winfo_toplevel().rastro.trecho("carregar página seguinte", 'widgets'):
+                topo = self._primeira_visivel()
+                itens = self.carregar(self._chave(filhos[-1]), None, self.tamanho_pagina)
+                for iid, valores in itens:
+                    self.tree.insert('', END, iid=iid, values=valores)
+                self.ha_mais_depois = len(itens) == self.tamanho_pagina
+                excesso = len(filhos) + len(itens) - self.PAGINAS_NA_JANELA * self.tamanho_pagina
+                if excesso > 0:
+                    self.tree.delete(*filhos[:excesso])
+                    self.ha_mais_antes = True
+                self._rolar_para(topo)
+        self._carregando = False
+
+    def _carregar_antes(self) -> None:
+        filhos = self.tree.get_children()
+        if filhos:
+            with self.winfo_toplevel().rastro.trecho("carregar página anterior", 'widgets'):
+                topo = self._primeira_visivel()
+                itens = self.carregar(None, self._chave(filhos[0]), self.tamanho_pagina)
+                for posicao, (iid, valores) in enumerate(itens):
+                    self.tree.insert('', posicao, iid=iid, values=valores)
+                self.ha_mais_antes = len(itens) == self.tamanho_pagina
+                excesso = len(filhos) + len(itens) - self.PAGINAS_NA_JANELA * self.tamanho_pagina
+                if excesso > 0:
+                    self.tree.delete(*filhos[-excesso:])
+                    self.ha_mais_depois = True
+                self._rolar_para(topo)
+        self._carregando = False
+
+    def _primeira_visivel(self) -> typing.Optional[str]:
+        filhos = self.tree.get_children()
+        if not filhos:
+            return None
+        return filhos[min(len(filhos) - 1, int(self.tree.yview()[0] * len(filhos)))]
+
+    def _rolar_para(self, iid: typing.Optional[str]) -> None:
+        """Mantém `iid` no topo depois de inserir/descartar linhas, para a lista não 'pular'."""
+        total = len(self.tree.get_children())
+        if iid is not None and self.tree.exists(iid) and total:
+            self.tree.yview_moveto(self.tree.index(iid) / total)
+
+    def atualizar_itens(self, itens: list, removidos: typing.Iterable[str] = ()) -> None:
+        """
+        Atualiza as linhas já exibidas e insere, na posição certa, as novas que
+        caem dentro da janela carregada (as demais aparecem quando a sua página
+        for carregada).
+        """
+        for iid in removidos:
+            if self.tree.exists(iid): self.tree.delete(iid)
+        filhos = list(self.tree.get_children())
+        for iid, valores in itens:
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=valores)
+                continue
+            chave = self.chave(iid, valores)
+            if filhos and ((self.ha_mais_antes and chave < self._chave(filhos[0])) or
+                           (self.ha_mais_depois and chave > self._chave(filhos[-1]))):
+                continue
+            posicao = bisect.bisect_left(filhos, chave, key=self._chave)
+            self.tree.insert('', posicao, iid=iid, values=valores)
+            filhos.insert(posicao, iid)
+
 # -----------------------------------------------------
 # CLASSES PRINCIPAIS (App e Login)
 # -----------------------------------------------------
 
 class App(ttk.Window):
-    def __init__(self):
+    """
+    Janela principal. As telas já construídas ficam guardadas (até
+    MAX_TELAS_EM_CACHE, descartando a usada há mais tempo) e a navegação só
+    troca qual delas está visível. Uma tela entra no cache se a classe define
+    chave_cache(app), que identifica a instância (ex.: o RA do painel do
+    aluno); ao reaparecer, a tela recebe ao_exibir() para atualizar os dados,
+    e ao sair, ao_ocultar().
+    """
+    MAX_TELAS_EM_CACHE = 4
+
+    def __init__(self, rastrear: typing.Optional[str] = None):
         super().__init__(themename=TEMA_BOOTSTRAP)
         self.title("Sistema Acadêmico ADS | Gestão de Notas")
         self.geometry("900x700") 
@@ -48,30 +346,93 @@ class App(ttk.Window):
         self.place_window_center()
 
         # Inicializa os módulos lógicos
-        self.gestor_bd = GestorBD()
+        # Perfil do SQLite: 'desktop' (padrão), 'servidor' ou 'rede_compartilhada'
+        perfil_bd = os.environ.get("SISTEMA_PERFIL_BD", PERFIL_SQLITE_PADRAO)
+        # Cache de leituras só no desktop: com o banco compartilhado, outras máquinas também gravam
+        cache_padrao = "256" if perfil_bd == PERFIL_SQLITE_PADRAO else "0"
+        # SISTEMA_INSTRUMENTAR_BD=1 mede o GestorBD; o relatório sai no F12 e ao fechar o programa
+        self.instrumentar = os.environ.get("SISTEMA_INSTRUMENTAR_BD", "") not in ("", "0")
+        # Rastreamento da interface (Chrome trace), gravado ao fechar: --rastrear ARQUIVO ou SISTEMA_RASTREAR_UI
+        self.rastro = RastreadorUI(rastrear or os.environ.get("SISTEMA_RASTREAR_UI") or None)
+        # Quem sai e entra de novo em poucos minutos não paga outro bcrypt (SISTEMA_SESSOES_LOGIN=0 desliga)
+        self.gestor_bd = GestorBD(perfil=perfil_bd, cache_leituras=int(os.environ.get("SISTEMA_CACHE_BD", cache_padrao)),
+                                  instrumentar=self.instrumentar or self.rastro.ativo,
+                                  sessoes_login=int(os.environ.get("SISTEMA_SESSOES_LOGIN", "64")))
+        if self.rastro.ativo:
+            # As chamadas ao banco entram no trace como trechos 'bd'
+            self.gestor_bd.instrumentacao.rastreador = self.rastro
         self.gestor_bd.inicializar_db() # Garante que tabelas existam
         self.calculadora = CalculadoraAcademica()
+        self.calculadora.calcular_ms = self.rastro.envolver(self.calculadora.calcular_ms, "calcular_ms", 'calculo')
+        self.calculadora.calcular_ms_lote = self.rastro.envolver(self.calculadora.calcular_ms_lote, "calcular_ms_lote", 'calculo')
+        self.tarefas = ExecutorTarefas(self)
         
         self.usuario_logado: typing.Optional[dict] = None 
         self.ra_logado: typing.Optional[str] = None
         self.materia_logado: typing.Optional[str] = None
+        self._telas: OrderedDict[tuple, ttk.Frame] = OrderedDict()
+        self._tela_atual: typing.Optional[ttk.Frame] = None
 
         self._criar_container()
         self.mostrar_tela(TelaLogin)
+        if self.gestor_bd.custo_calibrado() is None:
+            # Máquina ainda não calibrada: mede o bcrypt no worker, antes do primeiro login, sem travar a janela
+            self.tarefas.executar(self, self.gestor_bd.calibrar_bcrypt, ao_concluir=lambda custo: None)
 
         self.protocol("WM_DELETE_WINDOW", self.fechar_app)
+        if self.instrumentar:
+            self.bind('<F12>', lambda e: self.despejar_instrumentacao())
 
     def _criar_container(self):
         self.container = ttk.Frame(self)
         self.container.pack(side="top", fill="both", expand=True)
 
     def mostrar_tela(self, ClasseTela: typing.Type[ttk.Frame], **kwargs: typing.Any) -> None:
-        for widget in self.container.winfo_children():
-            widget.destroy()
-        tela = ClasseTela(self.container, self, **kwargs)
+        interacao = self.rastro.iniciar_interacao(f"navegar {ClasseTela.__name__}")
+        chave = None
+        # Telas com argumentos extras são sempre construídas de novo
+        if hasattr(ClasseTela, 'chave_cache') and not kwargs:
+            chave = (ClasseTela, *ClasseTela.chave_cache(self))
+
+        anterior = self._tela_atual
+        if anterior is not None:
+            if hasattr(anterior, 'ao_ocultar'): anterior.ao_ocultar()
+            anterior.pack_forget()
+            if anterior not in self._telas.values():
+                anterior.destroy()
+
+        tela = self._telas.get(chave) if chave is not None else None
+        if tela is not None:
+            self._telas.move_to_end(chave)
+            if hasattr(tela, 'ao_exibir'): tela.ao_exibir()
+        else:
+            with self.rastro.trecho(f"construir {ClasseTela.__name__}", 'widgets'):
+                tela = ClasseTela(self.container, self, **kwargs)
+            if chave is not None:
+                self._telas[chave] = tela
+                while len(self._telas) > self.MAX_TELAS_EM_CACHE:
+                    _, descartada = self._telas.popitem(last=False)
+                    descartada.destroy()
+        self._tela_atual = tela
         tela.pack(fill="both", expand=True)
+        self.rastro.concluir_interacao(interacao, self)
+
+    def despejar_instrumentacao(self):
+        """Imprime o relatório da instrumentação do GestorBD e salva as medições em JSON."""
+        if not self.instrumentar:
+            return
+        caminho = os.environ.get("SISTEMA_INSTRUMENTACAO_ARQUIVO", "instrumentacao_bd.json")
+        print(self.gestor_bd.relatorio_instrumentacao())
+        self.gestor_bd.instrumentacao.salvar_json(caminho)
+        print(f"Medições salvas em {caminho}")
 
     def fechar_app(self):
+        self.despejar_instrumentacao()
+        caminho = self.rastro.salvar()
+        if caminho:
+            print(f"Trace da interface salvo em {caminho} (abra em chrome://tracing ou ui.perfetto.dev)")
+        # O worker termina antes: fechar_conexao() não pode fechar uma conexão em uso
+        self.tarefas.encerrar()
         self.gestor_bd.fechar_conexao()
         self.destroy()
 
@@ -82,6 +443,14 @@ class TelaLogin(ttk.Frame):
         self.gestor_bd = app.gestor_bd
         self._criar_widgets()
 
+    @staticmethod
+    def chave_cache(app) -> tuple:
+        return ()
+
+    def ao_exibir(self):
+        # A senha digitada não fica na tela depois de sair
+        self.entry_senha.delete(0, END)
+
     def _criar_widgets(self):
         main_frame = ttk.Frame(self, padding=45, style='light.TFrame', relief=FLAT) 
         main_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
@@ -106,7 +475,9 @@ class TelaLogin(ttk.Frame):
         self.entry_senha = ttk.Entry(main_frame, show="*", bootstyle="primary", font=('Arial', 12))
         self.entry_senha.pack(pady=(0, 30), ipadx=30, ipady=8, fill=tk.X)
         
-        ttk.Button(main_frame, text="Entrar", command=self._processar_login, bootstyle="primary", width=30, padding=10).pack(pady=10)
+        self.btn_entrar = ttk.Button(main_frame, text="Entrar", command=self._processar_login, bootstyle="primary", width=30, padding=10)
+        self.btn_entrar.pack(pady=10)
+        self.ocupado = EstadoOcupado(self, self.btn_entrar, "Verificando...")
         ttk.Button(main_frame, text="Novo Cadastro", command=lambda: self.app.mostrar_tela(TelaCadastro), bootstyle="secondary-link", width=30, padding=10).pack(pady=5)
 
         self.tipo_login_var.trace_add("write", self._atualizar_credencial_label)
@@ -116,6 +487,7 @@ class TelaLogin(ttk.Frame):
         self.label_credencial.config(text="RA:" if tipo == 'aluno' else "Email:")
 
     def _processar_login(self):
+        if self.ocupado.ativo: return
         credencial = self.entry_credencial.get().strip()
         senha_limpa = self.entry_senha.get().strip()
         tipo = self.tipo_login_var.get()
@@ -124,8 +496,13 @@ class TelaLogin(ttk.Frame):
             messagebox.showerror("Erro de Login", "Por favor, preencha a credencial e a senha.")
             return
 
-        usuario_data = self.gestor_bd.buscar_login(credencial, senha_limpa, tipo)
+        self.ocupado.iniciar()
+        self.app.tarefas.executar(self, self.gestor_bd.buscar_login, credencial, senha_limpa, tipo,
+                                  ao_concluir=lambda usuario_data: self._concluir_login(usuario_data, tipo),
+                                  ao_falhar=self.ocupado.falhar)
 
+    def _concluir_login(self, usuario_data: typing.Optional[dict], tipo: str):
+        self.ocupado.finalizar()
         if usuario_data:
             self.app.usuario_logado = usuario_data
             if tipo == 'aluno':
@@ -140,14 +517,22 @@ class TelaLogin(ttk.Frame):
                 self.app.mostrar_tela(PainelProfessor) 
         else:
             messagebox.showerror("Erro de Login", "Credenciais incorretas ou tipo de usuário inválido.")
-        
 
-    class TelaCadastro(ttk.Frame):
-        def __init__(self, master, app):
-            super().__init__(master, padding=50)
-            self.app = app
-            self.gestor_bd = app.gestor_bd
-            self._criar_widgets()
+
+class TelaCadastro(ttk.Frame):
+    def __init__(self, master, app):
+        super().__init__(master, padding=50)
+        self.app = app
+        self.gestor_bd = app.gestor_bd
+        self._criar_widgets()
+
+    @staticmethod
+    def chave_cache(app) -> tuple:
+        return ()
+
+    def ao_exibir(self):
+        for entrada in (self.entry_nome, self.entry_email, self.entry_senha, self.entry_conf_senha, self.entry_ra):
+            entrada.delete(0, END)
 
     def _criar_widgets(self):
         main_frame = ttk.Frame(self, padding=45, style='light.TFrame', relief=FLAT)
@@ -191,7 +576,9 @@ class TelaLogin(ttk.Frame):
         self.var_materia.set(MATERIAS_ADS[0]) 
         self.option_materia = ttk.OptionMenu(main_frame, self.var_materia, self.var_materia.get(), *MATERIAS_ADS, bootstyle="primary") 
         
-        ttk.Button(main_frame, text="Cadastrar", command=self._processar_cadastro, bootstyle="primary", width=30, padding=10).grid(row=r+1, column=0, columnspan=2, pady=20) 
+        self.btn_cadastrar = ttk.Button(main_frame, text="Cadastrar", command=self._processar_cadastro, bootstyle="primary", width=30, padding=10)
+        self.btn_cadastrar.grid(row=r+1, column=0, columnspan=2, pady=20) 
+        self.ocupado = EstadoOcupado(self, self.btn_cadastrar, "Cadastrando...")
         ttk.Button(main_frame, text="Voltar para Login", command=lambda: self.app.mostrar_tela(TelaLogin), bootstyle="secondary-link", width=30, padding=10).grid(row=r+2, column=0, columnspan=2, pady=5) 
         
         self.tipo_cadastro_var.trace_add("write", self._alternar_campos)
@@ -212,6 +599,7 @@ class TelaLogin(ttk.Frame):
             self.option_materia.grid(row=7, column=1, sticky='ew', padx=5, pady=5)
             
     def _processar_cadastro(self):
+        if self.ocupado.ativo: return
         tipo = self.tipo_cadastro_var.get()
         nome = self.entry_nome.get().strip()
         email = self.entry_email.get().strip()
@@ -233,7 +621,13 @@ class TelaLogin(ttk.Frame):
             materia = self.var_materia.get()
             usuario = Professor(nome, email, "", materia)
 
-        sucesso, mensagem = self.gestor_bd.adicionar_usuario(usuario, senha_limpa)
+        self.ocupado.iniciar()
+        self.app.tarefas.executar(self, self.gestor_bd.adicionar_usuario, usuario, senha_limpa,
+                                  ao_concluir=self._concluir_cadastro, ao_falhar=self.ocupado.falhar)
+
+    def _concluir_cadastro(self, resultado: tuple[bool, str]):
+        self.ocupado.finalizar()
+        sucesso, mensagem = resultado
         if sucesso:
             messagebox.showinfo("Sucesso", mensagem)
             self.app.mostrar_tela(TelaLogin)
@@ -263,9 +657,12 @@ class TelaPrimeiroAcesso(ttk.Frame):
         self.entry_senha = ttk.Entry(main_frame, show="*", width=40, bootstyle="primary", font=('Arial', 12))
         self.entry_senha.pack(pady=(0, 10), fill=tk.X, ipadx=30, ipady=5)
         
-        ttk.Button(main_frame, text="Salvar e Acessar Painel", command=self._processar, bootstyle="success", width=30, padding=10).pack(pady=20)
+        self.btn_salvar = ttk.Button(main_frame, text="Salvar e Acessar Painel", command=self._processar, bootstyle="success", width=30, padding=10)
+        self.btn_salvar.pack(pady=20)
+        self.ocupado = EstadoOcupado(self, self.btn_salvar, "Salvando...")
 
     def _processar(self):
+        if self.ocupado.ativo: return
         email = self.entry_email.get().strip()
         senha = self.entry_senha.get().strip()
         ra = self.app.ra_logado
@@ -274,7 +671,14 @@ class TelaPrimeiroAcesso(ttk.Frame):
             messagebox.showerror("Erro", "Preencha e-mail e senha (mín 6).")
             return
 
-        sucesso, msg = self.gestor_bd.atualizar_aluno_primeiro_acesso(ra, email, senha)
+        self.ocupado.iniciar()
+        self.app.tarefas.executar(self, self.gestor_bd.atualizar_aluno_primeiro_acesso, ra, email, senha,
+                                  ao_concluir=lambda resultado: self._concluir(resultado, email),
+                                  ao_falhar=self.ocupado.falhar)
+
+    def _concluir(self, resultado: tuple[bool, str], email: str):
+        self.ocupado.finalizar()
+        sucesso, msg = resultado
         if sucesso:
             messagebox.showinfo("Sucesso", msg)
             self.app.usuario_logado['email'] = email
@@ -293,10 +697,28 @@ class PainelAluno(ttk.Frame):
         self._materia_frames = {}
         self.entradas_projecao = {}
         self.labels_projecao_resultado = {}
+        # Abas de matéria ainda vazias (caminho do frame -> matéria): os widgets
+        # só são criados quando a aba é aberta pela primeira vez
+        self._abas_pendentes: typing.Dict[str, str] = {}
+        # Última linha calculada de cada matéria: (np1, np2, pim, ms, código do status)
+        self._boletim: typing.Dict[str, tuple] = {}
         
         self._criar_widgets()
+        self.sincronizador = SincronizadorAlteracoes(self, app.tarefas, self._ler_alteracoes, self._aplicar_boletim)
         self._atualizar_todas_abas() 
 
+    @staticmethod
+    def chave_cache(app) -> tuple:
+        return (app.ra_logado,)
+
+    def ao_exibir(self):
+        # Só as matérias alteradas desde a última visita
+        self.sincronizador.retomar()
+
+    def ao_ocultar(self):
+        self.sincronizador.pausar()
+        fechar_janelas(self)
+
     def _criar_widgets(self):
         header = ttk.Frame(self, padding=(15, 10), bootstyle="primary")
         header.pack(fill='x', pady=(0, 15))
@@ -307,7 +729,20 @@ class PainelAluno(ttk.Frame):
         self.notebook.pack(expand=True, fill="both")
         self._criar_aba_resumo()
         for materia in MATERIAS_ADS:
-            self._criar_aba_materia(materia)
+            frame = ttk.Frame(self.notebook, padding=15)
+            self.notebook.add(frame, text=materia)
+            self._abas_pendentes[str(frame)] = materia
+        self.notebook.bind('<<NotebookTabChanged>>', self._ao_trocar_aba)
+
+    def _ao_trocar_aba(self, event):
+        aba = self.notebook.select()
+        materia = self._abas_pendentes.pop(aba, None)
+        if materia is not None:
+            interacao = self.app.rastro.iniciar_interacao(f"abrir aba {materia}")
+            with self.app.rastro.trecho(f"construir aba {materia}", 'widgets'):
+                self._criar_aba_materia(materia, self.nametowidget(aba))
+                self._preencher_aba(materia)
+            self.app.rastro.concluir_interacao(interacao, self)
             
     def _criar_aba_resumo(self):
         frame = ttk.Frame(self.notebook, padding=15)
@@ -317,9 +752,7 @@ class PainelAluno(ttk.Frame):
         self.tree_resumo.pack(expand=True, fill='both')
         self.tree_resumo.tag_configure('success', foreground='#28a745'); self.tree_resumo.tag_configure('danger', foreground='#dc3545')
 
-    def _criar_aba_materia(self, materia):
-        frame = ttk.Frame(self.notebook, padding=15)
-        self.notebook.add(frame, text=materia)
+    def _criar_aba_materia(self, materia, frame):
         frame.columnconfigure(0, weight=1); frame.columnconfigure(1, weight=1)
         
         # Frame Notas
@@ -350,30 +783,70 @@ class PainelAluno(ttk.Frame):
         self.labels_projecao_resultado[materia+"_FB"].grid(row=1, columnspan=2, pady=10)
 
     def _atualizar_todas_abas(self):
-        self.tree_resumo.delete(*self.tree_resumo.get_children())
-        _, _, pim_g = self.gestor_bd.buscar_notas_aluno(self.ra, PIM_MATERIA)
+        with self.app.rastro.trecho("_atualizar_todas_abas", 'widgets'):
+            self.sincronizador.versao = self.gestor_bd.versao_alteracoes()
+            self.tree_resumo.delete(*self.tree_resumo.get_children())
+            self._boletim.clear()
+            self._aplicar_boletim(self.gestor_bd.buscar_boletim_aluno(self.ra))
+
+    def _ler_alteracoes(self, versao: int) -> tuple[int, list]:
+        """Roda no worker: linhas do boletim das matérias alteradas desde `versao`."""
+        nova_versao, materias = self.gestor_bd.buscar_alteracoes_aluno(self.ra, versao)
+        if not materias and materias is not None:
+            return nova_versao, []
+        boletim = self.gestor_bd.buscar_boletim_aluno(self.ra)
+        # None = registro antigo demais; None dentro do conjunto = PIM (todas as matérias)
+        if materias is None or None in materias:
+            return nova_versao, boletim
+        return nova_versao, [linha for linha in boletim if linha[0] in materias]
+
+    def _aplicar_boletim(self, boletim: list):
+        """Atualiza as abas e o sumário apenas das matérias presentes em `boletim`."""
+        if not boletim:
+            return
+        resultado = self.calculadora.calcular_ms_lote(
+            [np1 or 0 for _, np1, _, _ in boletim],
+            [np2 or 0 for _, _, np2, _ in boletim],
+            [pim or 0 for _, _, _, pim in boletim],
+        )
         
-        for mat in MATERIAS_ADS:
-            np1, np2, _ = self.gestor_bd.buscar_notas_aluno(self.ra, mat)
-            pim = pim_g
-            ms, st, cor = self.calculadora.calcular_ms(np1 or 0, np2 or 0, pim or 0)
-            
-            # Atualiza labels
-            lbls = self._materia_frames[mat]
-            lbls['NP1'].config(text=f"{np1:.1f}" if np1 else "-")
-            lbls['NP2'].config(text=f"{np2:.1f}" if np2 else "-")
-            lbls['PIM'].config(text=f"{pim:.1f}" if pim else "-")
-            lbls['Média'].config(text=f"{ms:.2f}", bootstyle=cor)
-            lbls['Status'].config(text=st, bootstyle=cor)
-            
-            self.tree_resumo.insert('', END, values=(np1, np2, pim, f"{ms:.2f}", st), tags=(cor,))
+        for (mat, np1, np2, pim), ms, codigo in zip(boletim, resultado.ms, resultado.status):
+            st = self.calculadora.STATUS_NOMES[codigo]
+            cor = self.calculadora.STATUS_CORES[codigo]
+            self._boletim[mat] = (np1, np2, pim, ms, codigo)
             
-            # Feedback
-            if st in ["Reprovado", "Em Exame"]:
-                msg = FEEDBACKS_ESTUDO.get(mat, "Estude mais!")
-                self.labels_projecao_resultado[mat+"_FB"].config(text=f"⚠️ {msg}", bootstyle="danger")
+            valores = (np1, np2, pim, f"{ms:.2f}", st)
+            if self.tree_resumo.exists(mat):
+                self.tree_resumo.item(mat, values=valores, tags=(cor,))
             else:
-                 self.labels_projecao_resultado[mat+"_FB"].config(text="Aprovado! Parabéns.", bootstyle="success")
+                self.tree_resumo.insert('', END, iid=mat, values=valores, tags=(cor,))
+            
+            # Abas ainda não abertas são preenchidas quando forem criadas
+            if mat in self._materia_frames:
+                self._preencher_aba(mat)
+
+    def _preencher_aba(self, mat):
+        """Mostra na aba da matéria a última linha do boletim lida."""
+        if mat not in self._boletim:
+            return
+        np1, np2, pim, ms, codigo = self._boletim[mat]
+        st = self.calculadora.STATUS_NOMES[codigo]
+        cor = self.calculadora.STATUS_CORES[codigo]
+        
+        # Atualiza labels
+        lbls = self._materia_frames[mat]
+        lbls['NP1'].config(text=f"{np1:.1f}" if np1 else "-")
+        lbls['NP2'].config(text=f"{np2:.1f}" if np2 else "-")
+        lbls['PIM'].config(text=f"{pim:.1f}" if pim else "-")
+        lbls['Média'].config(text=f"{ms:.2f}", bootstyle=cor)
+        lbls['Status'].config(text=st, bootstyle=cor)
+        
+        # Feedback
+        if st in ["Reprovado", "Em Exame"]:
+            msg = FEEDBACKS_ESTUDO.get(mat, "Estude mais!")
+            self.labels_projecao_resultado[mat+"_FB"].config(text=f"⚠️ {msg}", bootstyle="danger")
+        else:
+             self.labels_projecao_resultado[mat+"_FB"].config(text="Aprovado! Parabéns.", bootstyle="success")
 
     def _simular(self, materia):
         ents = self.entradas_projecao[materia]
@@ -402,8 +875,7 @@ class FormularioLancamentoNotas(tk.Toplevel):
         self._carregar()
 
     def _carregar(self):
-        np1, np2, _ = self.gestor.buscar_notas_aluno(self.ra, self.materia)
-        _, _, pim = self.gestor.buscar_notas_aluno(self.ra, PIM_MATERIA) # PIM Global
+        np1, np2, pim = self.gestor.buscar_notas_aluno(self.ra, self.materia) # PIM Global
         
         if np1: self.entries['NP1'].insert(0, np1)
         if np2: self.entries['NP2'].insert(0, np2)
@@ -419,48 +891,161 @@ class FormularioLancamentoNotas(tk.Toplevel):
             n2 = float(self.entries['NP2'].get()) if self.entries['NP2'].get() else None
             pim_val = float(self.entries['PIM'].get()) if self.entries['PIM'].get() else None
             
-            self.gestor.lancar_nota(self.ra, self.materia, 'NP1', n1 if n1 is not None else 0)
-            self.gestor.lancar_nota(self.ra, self.materia, 'NP2', n2 if n2 is not None else 0)
+            notas = {'NP1': n1 if n1 is not None else 0, 'NP2': n2 if n2 is not None else 0}
             
-            # Se for matéria PIM, lança o PIM.
+            # Se for matéria PIM, lança o PIM global (vale para TODAS as matérias).
             if self.materia == PIM_MATERIA and pim_val is not None:
-                # Atualiza PIM em TODAS as matérias (Requisito do Sistema)
-                for m in MATERIAS_ADS:
-                     self.gestor.lancar_nota(self.ra, m, 'PIM', pim_val)
+                notas['PIM'] = pim_val
+
+            sucesso, msg = self.gestor.lancar_notas(self.ra, self.materia, notas)
+            if not sucesso:
+                messagebox.showerror("Erro", msg); return
 
             messagebox.showinfo("Sucesso", "Notas salvas!"); self.cb(self.ra); self.destroy()
         except ValueError: messagebox.showerror("Erro", "Valores numéricos inválidos")
 
 class PainelProfessor(ttk.Frame):
+    # Espera após a última tecla antes de buscar, para não consultar a cada letra
+    ATRASO_BUSCA_MS = 250
+    TODOS_STATUS = "Todos"
+
     def __init__(self, master, app):
         super().__init__(master, padding=20)
         self.app = app; self.gestor = app.gestor_bd; self.materia = app.materia_logado
+        # Filtro aplicado à tabela: (início do nome ou RA, status ou None)
+        self.filtro: tuple[str, typing.Optional[str]] = ("", None)
+        self._id_busca = None
         
         ttk.Label(self, text=f"Professor - {self.materia}", font=('Arial', 18, 'bold')).pack(pady=10)
         ttk.Button(self, text="Sair", command=lambda: app.mostrar_tela(TelaLogin), bootstyle="danger").pack(anchor='ne')
         
         ttk.Button(self, text="Cadastrar Aluno (Rápido)", command=self._cadastrar_aluno_rapido).pack(pady=5)
+        self.btn_importar = ttk.Button(self, text="Importar CSV (Alunos/Notas)", command=self._importar_csv, bootstyle="secondary")
+        self.btn_importar.pack(pady=5)
+        self.importando = EstadoOcupado(self, self.btn_importar, "Importando...")
         
-        self.tree = ttk.Treeview(self, columns=('RA', 'Nome', 'Média', 'Status'), show='headings')
-        for c in ('RA', 'Nome', 'Média', 'Status'): self.tree.heading(c, text=c)
-        self.tree.pack(expand=True, fill='both')
+        frame_filtro = ttk.Frame(self)
+        frame_filtro.pack(fill='x', pady=5)
+        ttk.Label(frame_filtro, text="Buscar (nome ou RA):").pack(side=tk.LEFT)
+        self.busca_var = tk.StringVar()
+        ttk.Entry(frame_filtro, textvariable=self.busca_var, width=30).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_filtro, text="Status:").pack(side=tk.LEFT, padx=(10, 0))
+        self.status_var = tk.StringVar(value=self.TODOS_STATUS)
+        ttk.Combobox(frame_filtro, textvariable=self.status_var, state='readonly', width=12,
+                     values=(self.TODOS_STATUS, *app.calculadora.STATUS_NOMES[:3])).pack(side=tk.LEFT, padx=5)
+        self.busca_var.trace_add('write', self._agendar_busca)
+        self.status_var.trace_add('write', self._agendar_busca)
+
+        self.lbl_total = ttk.Label(self, text="", bootstyle="secondary")
+        self.lbl_total.pack(anchor='w')
+        # Turmas grandes: só as páginas próximas da rolagem ficam carregadas
+        self.tabela = TabelaPaginada(self, ('RA', 'Nome', 'Média', 'Status'), self._chave, self._carregar_pagina)
+        self.tabela.pack(expand=True, fill='both')
+        self.tree = self.tabela.tree
         self.tree.bind('<Double-1>', self._editar_nota)
+        self.sincronizador = SincronizadorAlteracoes(self, app.tarefas, self._ler_alteracoes, self._aplicar_alteracoes)
         self._atualizar()
 
+    @staticmethod
+    def chave_cache(app) -> tuple:
+        return (app.usuario_logado['email'], app.materia_logado)
+
+    def ao_exibir(self):
+        # Só os alunos alterados desde a última visita
+        self.sincronizador.retomar()
+
+    def ao_ocultar(self):
+        self.sincronizador.pausar()
+        fechar_janelas(self)
+
     def _atualizar(self, *args):
-        self.tree.delete(*self.tree.get_children())
-        alunos = self.gestor.buscar_todos_alunos_da_materia(self.materia)
-        for nome, ra in alunos:
-            np1, np2, _ = self.gestor.buscar_notas_aluno(ra, self.materia)
-            _, _, pim = self.gestor.buscar_notas_aluno(ra, PIM_MATERIA)
-            ms, st, _ = self.app.calculadora.calcular_ms(np1 or 0, np2 or 0, pim or 0)
-            self.tree.insert('', END, values=(ra, nome, f"{ms:.2f}", st))
+        """Recarrega a turma a partir da primeira página."""
+        with self.app.rastro.trecho("PainelProfessor._atualizar", 'widgets'):
+            self.sincronizador.versao = self.gestor.versao_alteracoes()
+            self.tabela.recarregar()
+            self._atualizar_total()
+
+    def _atualizar_total(self):
+        self.lbl_total.config(text=f"{self.gestor.contar_alunos_da_materia(self.materia)} aluno(s) na turma")
+
+    def _chave(self, ra: str, valores: tuple) -> tuple:
+        # A mesma ordem da paginação do GestorBD para o filtro atual
+        return chave_paginacao(ra, str(valores[1]), self.filtro[0])
+
+    def _carregar_pagina(self, apos, antes, limite, filtro: typing.Optional[tuple] = None) -> list:
+        busca, status = filtro or self.filtro
+        return self._formatar(self.gestor.buscar_pagina_turma(
+            self.materia, limite, apos=apos, antes=antes, busca=busca, status=status))
+
+    def _agendar_busca(self, *args):
+        """Reinicia a espera a cada tecla; a busca roda só quando o usuário para de digitar."""
+        if self._id_busca is not None:
+            self.after_cancel(self._id_busca)
+        self._id_busca = self.after(self.ATRASO_BUSCA_MS, self._buscar)
+
+    def _filtro_digitado(self) -> tuple[str, typing.Optional[str]]:
+        status = self.status_var.get()
+        return self.busca_var.get().strip(), None if status == self.TODOS_STATUS else status
+
+    def _buscar(self):
+        self._id_busca = None
+        filtro = self._filtro_digitado()
+        interacao = self.app.rastro.iniciar_interacao(f"buscar {filtro}")
+        # A primeira página é lida no worker; a tabela troca de filtro só quando ela chega
+        self.app.tarefas.executar(self, self._carregar_pagina, None, None, self.tabela.tamanho_pagina, filtro,
+                                  ao_concluir=lambda itens: self._exibir_busca(filtro, itens, interacao))
+
+    def _exibir_busca(self, filtro: tuple, itens: list, interacao=None):
+        # Resultado de uma busca já substituída por outra digitação: descarta
+        if filtro != self._filtro_digitado():
+            self.app.rastro.concluir_interacao(interacao, self)
+            return
+        self.filtro = filtro
+        with self.app.rastro.trecho("exibir busca", 'widgets'):
+            self.tabela.recarregar(itens)
+        self.app.rastro.concluir_interacao(interacao, self)
+
+    def _visivel(self, ra: str, valores: tuple) -> bool:
+        busca, status = self.filtro
+        return corresponde_busca(ra, valores[1], busca) and status in (None, valores[3])
+
+    def _sincronizar(self, *args):
+        """Atualiza só os alunos cujas notas mudaram desde a última leitura."""
+        self.sincronizador.sincronizar()
+
+    def _ler_alteracoes(self, versao: int) -> tuple[int, typing.Optional[tuple[set, list]]]:
+        """Roda no worker: RAs alterados desde `versao` e as suas linhas atuais."""
+        nova_versao, ras = self.gestor.buscar_alteracoes_turma(self.materia, versao)
+        if ras is None:
+            return nova_versao, None
+        return nova_versao, (ras, self.gestor.buscar_boletim_alunos_da_turma(self.materia, ras) if ras else [])
+
+    def _aplicar_alteracoes(self, alteracoes: typing.Optional[tuple[set, list]]):
+        if alteracoes is None:
+            self._atualizar(); return
+        ras, linhas = alteracoes
+        # RAs alterados sem linha na matéria deixaram a turma; os que saíram do
+        # filtro (por exemplo, mudaram de status) também saem da tabela
+        itens = [(ra, valores) for ra, valores in self._formatar(linhas) if self._visivel(ra, valores)]
+        self.tabela.atualizar_itens(itens, ras - {ra for ra, _ in itens})
+        if ras: self._atualizar_total()
+
+    def _formatar(self, turma: list) -> list:
+        """Linhas (ra, nome, np1, np2, pim) -> itens (ra, valores da tabela) com MS e status."""
+        calc = self.app.calculadora
+        resultado = calc.calcular_ms_lote(
+            [np1 or 0 for _, _, np1, _, _ in turma],
+            [np2 or 0 for _, _, _, np2, _ in turma],
+            [pim or 0 for _, _, _, _, pim in turma],
+        )
+        return [(ra, (ra, nome, f"{ms:.2f}", calc.STATUS_NOMES[codigo]))
+                for (ra, nome, *_), ms, codigo in zip(turma, resultado.ms, resultado.status)]
 
     def _editar_nota(self, event):
         item = self.tree.selection()
         if not item: return
         ra = self.tree.item(item, 'values')[0]
-        FormularioLancamentoNotas(self, self.gestor, self.materia, ra, self._atualizar)
+        FormularioLancamentoNotas(self, self.gestor, self.materia, ra, self._sincronizar)
         
     def _cadastrar_aluno_rapido(self):
         # Janela simples para cadastro rápido pelo professor
@@ -469,12 +1054,44 @@ class PainelProfessor(ttk.Frame):
         ttk.Label(top, text="RA:").pack(); e_ra = ttk.Entry(top); e_ra.pack()
         def save():
              if self.gestor.adicionar_aluno_professor(e_nome.get(), e_ra.get(), self.materia, "123456"):
-                 messagebox.showinfo("Ok", "Cadastrado! Senha inicial: 123456"); self._atualizar(); top.destroy()
+                 messagebox.showinfo("Ok", "Cadastrado! Senha inicial: 123456"); self._sincronizar(); top.destroy()
              else: messagebox.showerror("Erro", "Erro ao cadastrar")
         ttk.Button(top, text="Salvar", command=save).pack(pady=10)
 
+    def _importar_csv(self):
+        if self.importando.ativo: return
+        caminho = filedialog.askopenfilename(parent=self, title="Importar CSV", filetypes=[("CSV", "*.csv"), ("Todos os arquivos", "*.*")])
+        if not caminho: return
+        from importacao import ImportadorCSV  # carregado só quando o professor importa
+        # A importação (com o bcrypt de cada aluno novo) roda no worker, sem congelar a janela
+        self.importando.iniciar()
+        self.app.tarefas.executar(self, ImportadorCSV(self.gestor, self.materia).importar, caminho,
+                                  ao_concluir=self._concluir_importacao, ao_falhar=self._falhar_importacao)
+
+    def _concluir_importacao(self, relatorio):
+        self.importando.finalizar()
+        if relatorio.erros: messagebox.showwarning("Importação", relatorio.resumo())
+        else: messagebox.showinfo("Importação", relatorio.resumo())
+        self._sincronizar()
+
+    def _falhar_importacao(self, erro: BaseException):
+        if isinstance(erro, (OSError, UnicodeDecodeError)):
+            self.importando.finalizar()
+            messagebox.showerror("Erro", f"Não foi possível ler o arquivo: {erro}")
+        else:
+            self.importando.falhar(erro)
+
 if __name__ == "__main__":
-    app = App()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sistema Acadêmico ADS.")
+    parser.add_argument("--rastrear", metavar="ARQUIVO",
+                        help="Grava um trace da interface (formato Chrome trace) em ARQUIVO ao fechar.")
+    args = parser.parse_args()
+    app = App(rastrear=args.rastrear)
+    # Usado por ferramentas/tempo_inicializacao.py: fecha assim que a primeira tela é desenhada
+    if os.environ.get("SISTEMA_MEDIR_INICIO"):
+        app.after_idle(app.fechar_app)
     app.mainloop()
 
     
\ No newline at end of file
@@ -1,6 +1,40 @@
-from typing import Tuple, Union
+from typing import NamedTuple, Sequence, Tuple, Union
+from array import array
 import math 
 
+# NumPy é opcional (sem ele o cálculo em lote usa array('d')) e só é
+# importado no primeiro lote grande: importá-lo custa mais que a abertura
+# do resto do sistema, e boletins e páginas da turma não precisam dele.
+np = None
+_numpy_verificado = False
+
+
+def _carregar_numpy():
+    global np, _numpy_verificado
+    if not _numpy_verificado:
+        _numpy_verificado = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+
+class ResultadoLote(NamedTuple):
+    """
+    Resultado de CalculadoraAcademica.calcular_ms_lote, uma posição por linha.
+    ms:      médias arredondadas (NaN nas linhas inválidas)
+    status:  códigos CalculadoraAcademica.STATUS_* (índices de STATUS_NOMES/STATUS_CORES)
+    cores:   cor bootstrap de cada linha
+    validos: máscara das linhas com todas as notas em [0.0, 10.0]
+    """
+    ms: Sequence[float]
+    status: Sequence[int]
+    cores: Sequence[str]
+    validos: Sequence[bool]
+
+
 class CalculadoraAcademica:
     
     # Constantes
@@ -12,6 +46,31 @@ class CalculadoraAcademica:
     NOTA_MAXIMA = 10.0
     NOTA_MINIMA = 0.0
 
+    # Códigos de status do cálculo em lote
+    STATUS_APROVADO = 0
+    STATUS_EXAME = 1
+    STATUS_REPROVADO = 2
+    STATUS_INVALIDO = 3
+    STATUS_NOMES = ("Aprovado", "Em Exame", "Reprovado", "Erro de Cálculo")
+    STATUS_CORES = ("success", "warning", "danger", "secondary")
+    # Abaixo deste tamanho o lote é calculado com array('d'), sem carregar o NumPy
+    LOTE_MINIMO_NUMPY = 1000
+
+    @classmethod
+    def menor_ms_bruta(cls, nota: float) -> float:
+        """
+        Menor MS ainda sem arredondar que, arredondada em 2 casas como em
+        calcular_ms, chega a `nota`. Comparar a MS bruta com este limite dá o
+        mesmo status que calcular_ms sem depender de outro arredondamento
+        (o np.round e o ROUND do SQLite não arredondam sempre como o round()).
+        """
+        limite = nota - 0.005
+        while round(limite, 2) >= nota:
+            limite = math.nextafter(limite, -math.inf)
+        while round(limite, 2) < nota:
+            limite = math.nextafter(limite, math.inf)
+        return limite
+
     # -----------------------------------------------
     # NOVO MÉTODO: VALIDAÇÃO DE ENTRADA
     # -----------------------------------------------
@@ -61,6 +120,66 @@ class CalculadoraAcademica:
             
         return ms_arredondada, status, cor_status
 
+    def calcular_ms_lote(self, np1: Sequence[float], np2: Sequence[float], pim: Sequence[float]) -> ResultadoLote:
+        """
+        Versão em lote de calcular_ms para turmas inteiras: recebe as colunas
+        NP1, NP2 e PIM (listas, array('d') ou arrays NumPy do mesmo tamanho) e
+        calcula MS, status e cor de todas as linhas de uma vez. Em vez de
+        parar na primeira nota inválida, marca a linha na máscara `validos`.
+
+        Com NumPy instalado, lotes a partir de LOTE_MINIMO_NUMPY linhas são
+        vetorizados; os demais (e todos, sem NumPy) usam array('d').
+        """
+        if len(np1) >= self.LOTE_MINIMO_NUMPY and _carregar_numpy() is not None:
+            return self._calcular_ms_lote_numpy(np1, np2, pim)
+        return self._calcular_ms_lote_array(np1, np2, pim)
+
+    def _calcular_ms_lote_numpy(self, np1, np2, pim) -> ResultadoLote:
+        n1 = np.asarray(np1, dtype=np.float64)
+        n2 = np.asarray(np2, dtype=np.float64)
+        p = np.asarray(pim, dtype=np.float64)
+
+        # NaN falha nas comparações e também cai como inválido
+        validos = np.ones(n1.shape, dtype=bool)
+        for coluna in (n1, n2, p):
+            validos &= (coluna >= self.NOTA_MINIMA) & (coluna <= self.NOTA_MAXIMA)
+
+        bruta = n1 * self.PESO_NP1 + n2 * self.PESO_NP2 + p * self.PESO_PIM
+        ms = np.round(bruta, 2)
+        ms[~validos] = np.nan
+
+        # O status sai da MS bruta: o np.round às vezes difere do round() de calcular_ms
+        status = np.full(ms.shape, self.STATUS_REPROVADO, dtype=np.int8)
+        status[bruta >= self.menor_ms_bruta(self.NOTA_EXAME_MIN)] = self.STATUS_EXAME
+        status[bruta >= self.menor_ms_bruta(self.NOTA_APROVACAO)] = self.STATUS_APROVADO
+        status[~validos] = self.STATUS_INVALIDO
+
+        cores = np.asarray(self.STATUS_CORES)[status]
+        return ResultadoLote(ms, status, cores, validos)
+
+    def _calcular_ms_lote_array(self, np1, np2, pim) -> ResultadoLote:
+        ms = array('d')
+        status = array('b')
+        validos = array('b')
+        minima, maxima = self.NOTA_MINIMA, self.NOTA_MAXIMA
+        for n1, n2, p in zip(np1, np2, pim):
+            if minima <= n1 <= maxima and minima <= n2 <= maxima and minima <= p <= maxima:
+                media = round(n1 * self.PESO_NP1 + n2 * self.PESO_NP2 + p * self.PESO_PIM, 2)
+                ms.append(media)
+                validos.append(1)
+                if media >= self.NOTA_APROVACAO:
+                    status.append(self.STATUS_APROVADO)
+                elif media >= self.NOTA_EXAME_MIN:
+                    status.append(self.STATUS_EXAME)
+                else:
+                    status.append(self.STATUS_REPROVADO)
+            else:
+                ms.append(math.nan)
+                validos.append(0)
+                status.append(self.STATUS_INVALIDO)
+        cores = [self.STATUS_CORES[codigo] for codigo in status]
+        return ResultadoLote(ms, status, cores, validos)
+
     def calcular_nota_exame(self, ms: float) -> float:
         """
         Calcula a nota mínima necessária no Exame Final (para a média final ser 5.0).
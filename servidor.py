@@ -0,0 +1,317 @@
+"""
+Serviço headless do sistema acadêmico: expõe o GestorBD e a CalculadoraAcademica
+por uma API HTTP/JSON local, para que muitos clientes consultem notas sem abrir
+o arquivo SQLite diretamente.
+
+Rotas:
+    POST /login                      {"credencial", "senha", "tipo"} -> {"token", "usuario"}
+    GET  /turmas/<materia>/boletim   (professor da matéria)          -> boletim da turma
+    GET  /alunos/<ra>/boletim        (o próprio aluno ou professor)   -> boletim do aluno
+    POST /notas                      (professor) {"lancamentos": [{"ra", "np1", "np2", "pim"}]}
+
+As rotas protegidas exigem o cabeçalho "Authorization: Bearer <token>".
+
+Todas as escritas passam por uma única thread (uma conexão de escrita); as
+leituras e o bcrypt do login rodam em um pool de threads leitoras, cada uma com
+sua conexão. Com o perfil 'servidor' (WAL) os leitores não esperam o escritor.
+
+Uso:
+    python servidor.py --porta 8080
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from gestor_db import GestorBD, PERFIS_SQLITE
+from modelos import PIM_MATERIA
+from servicos import CalculadoraAcademica
+
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+VALIDADE_TOKEN_S = 8 * 3600
+LIMITE_CABECALHOS = 100
+# Acima disso, sessões expiradas são descartadas a cada novo login
+LIMITE_SESSOES = 10000
+
+
+class ErroHTTP(Exception):
+    """Erro que vira uma resposta HTTP com {"erro": mensagem}."""
+
+    def __init__(self, status: HTTPStatus, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class ServidorAcademico:
+    def __init__(self, db_name: str = 'sistema_academico.db', perfil: str = 'servidor', leitores: typing.Optional[int] = None,
+                 instrumentar: bool = False):
+        # Os hashes refeitos no login são gravados pela thread de escrita, não pelas leitoras
+        self.gestor = GestorBD(db_name, perfil=perfil, instrumentar=instrumentar, refazer_hash_no_login=False)
+        self.calculadora = CalculadoraAcademica()
+        self._leitores = ThreadPoolExecutor(max_workers=leitores or min(16, (os.cpu_count() or 1) * 2), thread_name_prefix="leitor-bd")
+        self._escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor-bd")
+        self._sessoes: typing.Dict[str, tuple[dict, float]] = {}
+        self._servidor: typing.Optional[asyncio.AbstractServer] = None
+        self._conexoes: typing.Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        # (método, segmentos do caminho; None casa com qualquer segmento, handler)
+        self._rotas = [
+            ('POST', ('login',), self._rota_login),
+            ('GET', ('turmas', None, 'boletim'), self._rota_boletim_turma),
+            ('GET', ('alunos', None, 'boletim'), self._rota_boletim_aluno),
+            ('POST', ('notas',), self._rota_lancar_notas),
+        ]
+
+    # -----------------------------------------------
+    # CICLO DE VIDA
+    # -----------------------------------------------
+
+    async def iniciar(self, host: str = '127.0.0.1', porta: int = 8080) -> asyncio.AbstractServer:
+        await self._escrever(self.gestor.inicializar_db)
+        if self.gestor.custo_calibrado() is None:
+            # Máquina nova (ou banco copiado de outra): calibra antes de aceitar logins
+            custo = await self._escrever(self.gestor.calibrar_bcrypt)
+            print(f"Custo do bcrypt calibrado para esta máquina: {custo}")
+        self._servidor = await asyncio.start_server(self._atender_conexao, host, porta)
+        return self._servidor
+
+    async def encerrar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            # Fecha as conexões keep-alive ociosas para que os handlers terminem
+            tarefas = list(self._conexoes.values())
+            for writer in list(self._conexoes):
+                writer.close()
+            await asyncio.gather(*tarefas, return_exceptions=True)
+            await self._servidor.wait_closed()
+        self._leitores.shutdown(wait=True)
+        self._escritor.shutdown(wait=True)
+        if self.gestor.instrumentacao is not None:
+            print(self.gestor.relatorio_instrumentacao())
+        self.gestor.fechar_conexao()
+
+    async def _ler(self, funcao: typing.Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._leitores, funcao, *args)
+
+    async def _escrever(self, funcao: typing.Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._escritor, funcao, *args)
+
+    # -----------------------------------------------
+    # HTTP
+    # -----------------------------------------------
+
+    async def _atender_conexao(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._conexoes[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    linha = await reader.readline()
+                    if not linha:
+                        break
+                    try:
+                        metodo, alvo, versao = linha.decode('latin-1').strip().split(' ', 2)
+                    except ValueError:
+                        await self._responder(writer, HTTPStatus.BAD_REQUEST, {"erro": "Requisição inválida."}, manter=False)
+                        break
+
+                    cabecalhos = {}
+                    for _ in range(LIMITE_CABECALHOS):
+                        linha = await reader.readline()
+                        if linha in (b'\r\n', b'\n', b''):
+                            break
+                        nome, _, valor = linha.decode('latin-1').partition(':')
+                        cabecalhos[nome.strip().lower()] = valor.strip()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # readline() acusa linhas maiores que o limite do StreamReader com ValueError
+                    await self._responder(writer, HTTPStatus.BAD_REQUEST, {"erro": "Linha da requisição muito longa."}, manter=False)
+                    break
+
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                valor = cabecalhos.get('content-length') or '0'
+                if not (valor.isascii() and valor.isdigit()):
+                    await self._responder(writer, HTTPStatus.BAD_REQUEST, {"erro": "Content-Length inválido."}, manter=False)
+                    break
+                tamanho = int(valor)
+                if tamanho > TAMANHO_MAXIMO_CORPO:
+                    await self._responder(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"erro": "Corpo muito grande."}, manter=False)
+                    break
+                corpo = await reader.readexactly(tamanho) if tamanho else b''
+
+                status, resposta = await self._despachar(metodo.upper(), alvo, cabecalhos, corpo)
+                await self._responder(writer, status, resposta, manter)
+                if not manter:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._conexoes.pop(writer, None)
+            writer.close()
+
+    async def _responder(self, writer: asyncio.StreamWriter, status: HTTPStatus, dados: typing.Any, manter: bool):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        cabecalho = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n"
+        )
+        writer.write(cabecalho.encode('latin-1') + corpo)
+        await writer.drain()
+
+    async def _despachar(self, metodo: str, alvo: str, cabecalhos: dict, corpo: bytes) -> tuple[HTTPStatus, typing.Any]:
+        segmentos = tuple(unquote(s) for s in urlsplit(alvo).path.strip('/').split('/'))
+        try:
+            for metodo_rota, padrao, handler in self._rotas:
+                if len(padrao) == len(segmentos) and all(p is None or p == s for p, s in zip(padrao, segmentos)):
+                    if metodo != metodo_rota:
+                        raise ErroHTTP(HTTPStatus.METHOD_NOT_ALLOWED, "Método não permitido.")
+                    params = [s for p, s in zip(padrao, segmentos) if p is None]
+                    dados = json.loads(corpo) if corpo else {}
+                    if not isinstance(dados, dict):
+                        raise ErroHTTP(HTTPStatus.BAD_REQUEST, "O corpo deve ser um objeto JSON.")
+                    return await handler(cabecalhos, params, dados)
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, "Rota não encontrada.")
+        except ErroHTTP as e:
+            return e.status, {"erro": e.mensagem}
+        except json.JSONDecodeError:
+            return HTTPStatus.BAD_REQUEST, {"erro": "JSON inválido."}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": f"Erro interno: {e}"}
+
+    # -----------------------------------------------
+    # SESSÕES
+    # -----------------------------------------------
+
+    def _criar_sessao(self, usuario: dict) -> str:
+        agora = time.monotonic()
+        if len(self._sessoes) > LIMITE_SESSOES:
+            self._sessoes = {t: s for t, s in self._sessoes.items() if s[1] >= agora}
+        token = secrets.token_urlsafe(32)
+        self._sessoes[token] = (usuario, agora + VALIDADE_TOKEN_S)
+        return token
+
+    def _usuario(self, cabecalhos: dict) -> dict:
+        tipo, _, token = cabecalhos.get('authorization', '').partition(' ')
+        sessao = self._sessoes.get(token) if tipo.lower() == 'bearer' else None
+        if sessao is None or sessao[1] < time.monotonic():
+            self._sessoes.pop(token, None)
+            raise ErroHTTP(HTTPStatus.UNAUTHORIZED, "Token ausente ou expirado.")
+        return sessao[0]
+
+    # -----------------------------------------------
+    # ROTAS
+    # -----------------------------------------------
+
+    async def _rota_login(self, cabecalhos, params, dados):
+        credencial = str(dados.get('credencial', '')).strip()
+        senha = str(dados.get('senha', '')).strip()
+        tipo = dados.get('tipo')
+        if not credencial or not senha or tipo not in ('aluno', 'professor'):
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Informe credencial, senha e tipo ('aluno' ou 'professor').")
+        usuario = await self._ler(self.gestor.buscar_login, credencial, senha, tipo)
+        if self.gestor.hashes_pendentes:
+            await self._escrever(self.gestor.gravar_hashes_pendentes)
+        if not usuario:
+            raise ErroHTTP(HTTPStatus.UNAUTHORIZED, "Credenciais incorretas.")
+        return HTTPStatus.OK, {"token": self._criar_sessao(usuario), "usuario": usuario}
+
+    async def _rota_boletim_turma(self, cabecalhos, params, dados):
+        usuario = self._usuario(cabecalhos)
+        materia = params[0].upper()
+        if usuario['tipo'] != 'professor' or usuario['materia_principal'] != materia:
+            raise ErroHTTP(HTTPStatus.FORBIDDEN, "Apenas o professor da matéria pode ver o boletim da turma.")
+        linhas = await self._ler(self.gestor.buscar_boletim_turma, materia)
+        alunos = []
+        for ra, nome, np1, np2, pim in linhas:
+            ms, status, _ = self.calculadora.calcular_ms(np1 or 0, np2 or 0, pim or 0)
+            alunos.append({"ra": ra, "nome": nome, "np1": np1, "np2": np2, "pim": pim, "ms": ms, "status": status})
+        return HTTPStatus.OK, {"materia": materia, "alunos": alunos}
+
+    async def _rota_boletim_aluno(self, cabecalhos, params, dados):
+        usuario = self._usuario(cabecalhos)
+        ra = params[0].upper()
+        if usuario['tipo'] == 'aluno' and usuario['ra'] != ra:
+            raise ErroHTTP(HTTPStatus.FORBIDDEN, "O aluno só pode consultar o próprio boletim.")
+        linhas = await self._ler(self.gestor.buscar_boletim_aluno, ra)
+        if not linhas:
+            raise ErroHTTP(HTTPStatus.NOT_FOUND, f"Aluno RA {ra} não encontrado.")
+        materias = []
+        for materia, np1, np2, pim in linhas:
+            ms, status, _ = self.calculadora.calcular_ms(np1 or 0, np2 or 0, pim or 0)
+            materias.append({"materia": materia, "np1": np1, "np2": np2, "pim": pim, "ms": ms, "status": status})
+        return HTTPStatus.OK, {"ra": ra, "materias": materias}
+
+    async def _rota_lancar_notas(self, cabecalhos, params, dados):
+        usuario = self._usuario(cabecalhos)
+        if usuario['tipo'] != 'professor':
+            raise ErroHTTP(HTTPStatus.FORBIDDEN, "Apenas professores lançam notas.")
+        materia = usuario['materia_principal']
+        lancamentos = dados.get('lancamentos')
+        if not isinstance(lancamentos, list):
+            raise ErroHTTP(HTTPStatus.BAD_REQUEST, "Informe 'lancamentos' como uma lista.")
+
+        existentes = await self._ler(self.gestor.buscar_ras_existentes, [str(l.get('ra', '')) for l in lancamentos if isinstance(l, dict)])
+        registros, erros = [], []
+        for indice, lancamento in enumerate(lancamentos):
+            try:
+                registros.append(self._validar_lancamento(lancamento, materia, existentes))
+            except ValueError as ve:
+                erros.append({"indice": indice, "erro": str(ve)})
+
+        if registros:
+            sucesso, msg = await self._escrever(self.gestor.lancar_notas_lote, registros)
+            if not sucesso:
+                raise ErroHTTP(HTTPStatus.SERVICE_UNAVAILABLE, msg)
+        return HTTPStatus.OK, {"atualizados": len(registros), "erros": erros}
+
+    def _validar_lancamento(self, lancamento, materia: str, existentes: typing.Set[str]):
+        """Converte um item de 'lancamentos' no registro aceito por GestorBD.lancar_notas_lote."""
+        if not isinstance(lancamento, dict):
+            raise ValueError("Lançamento deve ser um objeto.")
+        ra = str(lancamento.get('ra', '')).upper()
+        if ra not in existentes:
+            raise ValueError(f"RA não cadastrado ({ra or 'vazio'}).")
+        if lancamento.get('pim') is not None and materia != PIM_MATERIA:
+            raise ValueError("O PIM só pode ser lançado pelo professor da matéria PIM.")
+        notas = []
+        for tipo in ('np1', 'np2', 'pim'):
+            valor = lancamento.get(tipo)
+            if valor is not None:
+                if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                    raise ValueError(f"Nota {tipo.upper()} inválida.")
+                if not CalculadoraAcademica.NOTA_MINIMA <= valor <= CalculadoraAcademica.NOTA_MAXIMA:
+                    raise ValueError(f"A nota {tipo.upper()} deve estar entre 0.0 e 10.0.")
+                valor = float(valor)
+            notas.append(valor)
+        return (ra, materia, *notas)
+
+
+async def _servir(args):
+    servidor = ServidorAcademico(args.db, perfil=args.perfil, leitores=args.leitores, instrumentar=args.instrumentar)
+    await servidor.iniciar(args.host, args.porta)
+    print(f"Servidor acadêmico em http://{args.host}:{args.porta} (banco: {args.db}, perfil: {args.perfil})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.encerrar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP/JSON do sistema acadêmico.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--db", default="sistema_academico.db")
+    parser.add_argument("--perfil", default="servidor", choices=list(PERFIS_SQLITE))
+    parser.add_argument("--leitores", type=int, help="Threads leitoras (padrão: 2 por núcleo, até 16).")
+    parser.add_argument("--instrumentar", action="store_true", help="Mede os métodos do GestorBD e mostra o relatório ao encerrar.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_servir(args))
+    except KeyboardInterrupt:
+        pass